@@ -1,7 +1,59 @@
 from django.contrib import admin
-from .models import Goal, Saving_Account, Checking_Account, Transaction
+from .models import Goal, Saving_Account, Checking_Account, Transaction, Recurring_Transaction, Job
+from .balances import delete_transactions, update_transactions
 
-admin.site.register(Goal)
-admin.site.register(Saving_Account)
-admin.site.register(Checking_Account)
-admin.site.register(Transaction)
\ No newline at end of file
+
+class TransactionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'transaction_type', 'amount', 'saving_goal', 'transaction_date', 'user']
+    actions = ['mark_income', 'mark_expenditure', 'unlink_goal']
+
+    # "Delete selected" goes through the balance layer so balances stay in sync
+    def delete_queryset(self, request, queryset):
+        delete_transactions(queryset)
+
+    # Bulk re-categorizing: one UPDATE plus one aggregated balance adjustment
+    @admin.action(description="Mark selected transactions as income")
+    def mark_income(self, request, queryset):
+        updated = update_transactions(queryset, transaction_type=Transaction.INCOME)
+        self.message_user(request, f"{updated} transaction(s) marked as income.")
+
+    @admin.action(description="Mark selected transactions as expenditure")
+    def mark_expenditure(self, request, queryset):
+        updated = update_transactions(queryset, transaction_type=Transaction.EXPENDITURE)
+        self.message_user(request, f"{updated} transaction(s) marked as expenditure.")
+
+    @admin.action(description="Unlink selected transactions from their goal")
+    def unlink_goal(self, request, queryset):
+        updated = update_transactions(queryset, saving_goal_id=None)
+        self.message_user(request, f"{updated} transaction(s) unlinked.")
+
+
+# Balances only move through transactions (journaled, see balances.py). The update pages set
+# one by booking an adjustment transaction
+class AccountAdmin(admin.ModelAdmin):
+    list_display = ['user', 'balance', 'last_updated']
+    list_select_related = ['user']
+    readonly_fields = ['balance']
+
+
+class GoalAdmin(admin.ModelAdmin):
+    list_display = ['name', 'user', 'amount_saved', 'target_amount', 'target_date']
+    readonly_fields = ['amount_saved']
+
+
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'interval', 'amount', 'saving_goal', 'next_date', 'end_date', 'user']
+    list_filter = ['interval']
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'status', 'attempts', 'run_at', 'updated_at']
+    list_filter = ['status', 'task']
+
+
+admin.site.register(Goal, GoalAdmin)
+admin.site.register(Saving_Account, AccountAdmin)
+admin.site.register(Checking_Account, AccountAdmin)
+admin.site.register(Transaction, TransactionAdmin)
+admin.site.register(Recurring_Transaction, RecurringTransactionAdmin)
+admin.site.register(Job, JobAdmin)
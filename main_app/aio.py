@@ -0,0 +1,42 @@
+# main_app/aio.py
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+async def auser(request):
+    """
+    The logged-in user, loaded without blocking the event loop. It also replaces
+    the lazy request.user, so templates and context processors don't fall back
+    to a synchronous lookup (which Django refuses to run in async code).
+    """
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+def _on_own_connection(func):
+    def run():
+        try:
+            return func()
+        finally:
+            # Worker threads never see request_finished: close (or keep, with CONN_MAX_AGE) like a request would
+            close_old_connections()
+    return run
+
+
+async def concurrently(*funcs):
+    """
+    Run independent blocking callables (ORM queries, cache lookups) at the same
+    time and return their results in order. Each runs on its own worker thread,
+    and so on its own database connection: Django's async ORM sends every query
+    of a request through one thread, which would run them one after the other.
+    With CONCURRENT_QUERIES off they run in turn on the request's thread and
+    connection (the benchmarks count queries that way).
+    """
+    if not getattr(settings, 'CONCURRENT_QUERIES', True):
+        return [await sync_to_async(func)() for func in funcs]
+    return await asyncio.gather(*(sync_to_async(_on_own_connection(func), thread_sensitive=False)() for func in funcs))
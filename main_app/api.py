@@ -0,0 +1,272 @@
+# main_app/api.py
+
+import json
+from decimal import Decimal
+
+from django import forms
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+
+from .models import Goal, Saving_Account, Checking_Account, Transaction
+from .pagination import keyset_page
+from .search import search_goals, search_transactions
+from .filters import TransactionFilterForm
+from .views import GoalForm
+from . import caching
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+TRANSACTION_FIELDS = ['id', 'name', 'description', 'transaction_type', 'saving_goal',
+                      'amount', 'saving_amount', 'checking_amount', 'transaction_date']
+GOAL_FIELDS = ['id', 'name', 'description', 'target_amount', 'amount_saved', 'target_date',
+               'status', 'image', 'progress', 'progress_status', 'projected_date', 'on_track']
+ACCOUNT_FIELDS = ['id', 'balance', 'last_updated']
+
+
+class CompactJSONEncoder(DjangoJSONEncoder):
+    # 12.500 -> "12.5", 10.000 -> "10": strings keep the precision, without the padding
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return format(o.normalize(), 'f')
+        return super().default(o)
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, encoder=CompactJSONEncoder, safe=False,
+                        json_dumps_params={'separators': (',', ':')})
+
+
+def api_error(message, status=400, **extra):
+    return api_response({'error': message, **extra}, status=status)
+
+
+def selected_fields(request, allowed):
+    # ?fields=name,amount -> only those columns are SELECTed (unknown names are ignored)
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(allowed)
+    fields = [field for field in requested.split(',') if field in allowed]
+    return fields or ['id']
+
+
+def parse_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class ApiView(View):
+    # Session authenticated like the rest of the site, but answers 401 JSON instead of redirecting
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_error("Authentication required.", status=401)
+        return super().dispatch(request, *args, **kwargs)
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        return api_error("Method not allowed.", status=405)
+
+
+def list_page(request, queryset, fields, date_field, transform=None):
+    try:
+        limit = min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+    except ValueError:
+        return api_error("limit must be a number")
+
+    # The cursor columns are always read, but only returned when asked for
+    columns = list(dict.fromkeys(fields + [date_field, 'id']))
+    rows, next_cursor, prev_cursor = keyset_page(
+        queryset.values(*columns),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        per_page=max(limit, 1),
+        date_field=date_field,
+    )
+    results = [{field: row[field] for field in fields} for row in rows]
+    if transform:
+        transform(results)
+    return api_response({
+        'results': results,
+        'next': next_cursor,
+        'previous': prev_cursor,
+    })
+
+
+def form_errors(form):
+    return api_error("Invalid data.", errors={field: [str(e) for e in errors] for field, errors in form.errors.items()})
+
+
+# Transactions
+
+class TransactionApiForm(forms.ModelForm):
+    class Meta:
+        model = Transaction
+        fields = ['name', 'transaction_type', 'description', 'saving_goal',
+                  'amount', 'saving_amount', 'checking_amount', 'transaction_date']
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Transactions can only be linked to the user's own goals
+        self.fields['saving_goal'].queryset = Goal.objects.filter(user=user)
+
+
+def save_transaction(request, instance=None):
+    data = parse_body(request)
+    if data is None:
+        return api_error("Body must be a JSON object.")
+    if instance is not None:
+        # PATCH: only the fields that were sent change
+        data = {**model_to_dict(instance, fields=TransactionApiForm.Meta.fields), **data}
+    form = TransactionApiForm(data, instance=instance, user=request.user)
+    if not form.is_valid():
+        return form_errors(form)
+    form.instance.user = request.user
+    try:
+        transaction = form.save()
+    except ValueError as e:
+        return api_error(str(e))
+    row = Transaction.objects.filter(pk=transaction.pk).values(*TRANSACTION_FIELDS).get()
+    return api_response(row, status=201 if instance is None else 200)
+
+
+class TransactionListApi(ApiView):
+    def get(self, request):
+        fields = selected_fields(request, TRANSACTION_FIELDS)
+        transactions = TransactionFilterForm(request.GET).filter(Transaction.objects.filter(user=request.user))
+        return list_page(request, transactions, fields, 'transaction_date')
+
+    def post(self, request):
+        return save_transaction(request)
+
+
+class TransactionDetailApi(ApiView):
+    def get_queryset(self):
+        return Transaction.objects.filter(user=self.request.user, pk=self.kwargs['pk'])
+
+    def get(self, request, pk):
+        row = self.get_queryset().values(*selected_fields(request, TRANSACTION_FIELDS)).first()
+        if row is None:
+            return api_error("Not found.", status=404)
+        return api_response(row)
+
+    def patch(self, request, pk):
+        transaction = self.get_queryset().first()
+        if transaction is None:
+            return api_error("Not found.", status=404)
+        return save_transaction(request, transaction)
+
+    def delete(self, request, pk):
+        transaction = self.get_queryset().first()
+        if transaction is None:
+            return api_error("Not found.", status=404)
+        transaction.delete()  # Reverses the balances
+        return HttpResponse(status=204)
+
+
+# Goals
+
+class GoalApiForm(GoalForm):
+    # Same validation as the HTML form, minus the image upload. The status can be
+    # left out: clean_status() derives it from the amounts
+    status = forms.ChoiceField(choices=Goal.STATUS_CHOICES, required=False)
+
+    class Meta(GoalForm.Meta):
+        fields = ['name', 'description', 'target_amount', 'amount_saved', 'target_date', 'status']
+
+
+def image_urls(rows):
+    # values() gives the stored file name, clients want the URL
+    for row in rows:
+        if 'image' in row:
+            row['image'] = default_storage.url(row['image']) if row['image'] else None
+
+
+def goal_rows(queryset, fields):
+    rows = list(queryset.with_progress().values(*fields))
+    image_urls(rows)
+    return rows
+
+
+def save_goal(request, instance=None):
+    data = parse_body(request)
+    if data is None:
+        return api_error("Body must be a JSON object.")
+    if instance is not None:
+        # The stored status isn't sent back: clean_status() derives it again
+        fields = [field for field in GoalApiForm.Meta.fields if field != 'status']
+        data = {**model_to_dict(instance, fields=fields), **data}
+    form = GoalApiForm(data, instance=instance)
+    if not form.is_valid():
+        return form_errors(form)
+    form.instance.user = request.user
+    goal = form.save()
+    return api_response(goal_rows(Goal.objects.filter(pk=goal.pk), GOAL_FIELDS)[0], status=201 if instance is None else 200)
+
+
+class GoalListApi(ApiView):
+    def get(self, request):
+        fields = selected_fields(request, GOAL_FIELDS)
+        goals = Goal.objects.filter(user=request.user).with_progress()
+        return list_page(request, goals, fields, 'target_date', transform=image_urls)
+
+    def post(self, request):
+        return save_goal(request)
+
+
+class GoalDetailApi(ApiView):
+    def get_queryset(self):
+        return Goal.objects.filter(user=self.request.user, pk=self.kwargs['pk'])
+
+    def get(self, request, pk):
+        rows = goal_rows(self.get_queryset(), selected_fields(request, GOAL_FIELDS))
+        if not rows:
+            return api_error("Not found.", status=404)
+        return api_response(rows[0])
+
+    def patch(self, request, pk):
+        goal = self.get_queryset().first()
+        if goal is None:
+            return api_error("Not found.", status=404)
+        return save_goal(request, goal)
+
+    def delete(self, request, pk):
+        deleted, _ = self.get_queryset().delete()
+        if not deleted:
+            return api_error("Not found.", status=404)
+        return HttpResponse(status=204)
+
+
+# Search
+
+class SearchApi(ApiView):
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        transactions = search_transactions(request.user, query) if query else []
+        goals = search_goals(request.user, query) if query else []
+        return api_response({
+            # Same fields as the list endpoint, where saving_goal is the goal's id
+            'transactions': [{field: getattr(transaction, 'saving_goal_id' if field == 'saving_goal' else field)
+                              for field in TRANSACTION_FIELDS} for transaction in transactions],
+            'goals': [{'id': goal.id, 'name': goal.name, 'description': goal.description, 'progress': goal.progress}
+                      for goal in goals],
+        })
+
+
+# Accounts (read only: balances only change through transactions)
+
+class AccountListApi(ApiView):
+    def get(self, request):
+        fields = selected_fields(request, ACCOUNT_FIELDS)
+        saving = caching.cached_list(caching.ACCOUNTS, request.user.id, 'saving_accounts',
+                                     lambda: Saving_Account.objects.filter(user=request.user))
+        checking = caching.cached_list(caching.ACCOUNTS, request.user.id, 'checking_accounts',
+                                       lambda: Checking_Account.objects.filter(user=request.user))
+        return api_response({
+            'saving_accounts': [{field: getattr(account, field) for field in fields} for account in saving],
+            'checking_accounts': [{field: getattr(account, field) for field in fields} for account in checking],
+        })
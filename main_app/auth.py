@@ -0,0 +1,83 @@
+# main_app/auth.py
+
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from django.core.cache import cache
+from django.db import transaction
+
+# Kept short: group/permission changes don't save the user row, so only the timeout refreshes them
+TIMEOUT = getattr(settings, 'MAIN_APP_USER_CACHE_TIMEOUT', 60)
+
+
+def _user_key(user_id):
+    return f'main_app:user:{user_id}'
+
+
+def forget_user(user_id):
+    # After commit, otherwise a concurrent request could cache the old row again (see signals.py)
+    transaction.on_commit(lambda: cache.delete(_user_key(user_id)))
+
+
+def _cache_entry(user):
+    # Every column but the password hash, and the session hash derived from it (what
+    # the session check needs), so the cache never holds anything a password can be
+    # cracked from
+    fields = {field.attname: getattr(user, field.attname) for field in user._meta.concrete_fields if field.attname != 'password'}
+    return {'db': user._state.db, 'fields': fields, 'session_auth_hash': user.get_session_auth_hash()}
+
+
+def _cached_user(entry):
+    # password is left deferred: reading it loads it, and save() only writes the loaded columns
+    fields = entry['fields']
+    user = get_user_model().from_db(entry['db'], list(fields), list(fields.values()))
+    user.get_session_auth_hash = partial(_session_auth_hash, user, entry['session_auth_hash'])
+    return user
+
+
+def _session_auth_hash(user, cached_hash):
+    # Computed again once the password is loaded or set (update_session_auth_hash() after a change)
+    if 'password' in user.__dict__:
+        return type(user).get_session_auth_hash(user)
+    return cached_hash
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose per-request user lookup (AuthenticationMiddleware,
+    request.auser()) is served from the cache. Entries are dropped whenever the
+    user is saved or deleted (so also on deactivation), and expire after
+    TIMEOUT seconds regardless. Inactive users are never cached, and neither is
+    the password hash (see _cache_entry).
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None:
+            # Stops authenticate() here: the ModelBackend listed after this one for old
+            # sessions would hash the same password again to reach the same answer
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        key = _user_key(user_id)
+        entry = cache.get(key)
+        if entry is not None:
+            return _cached_user(entry)
+        user = super().get_user(user_id)
+        if user is not None:
+            cache.set(key, _cache_entry(user), TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        key = _user_key(user_id)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return _cached_user(entry)
+        user = await super().aget_user(user_id)
+        if user is not None:
+            await cache.aset(key, _cache_entry(user), TIMEOUT)
+        return user
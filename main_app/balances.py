@@ -0,0 +1,300 @@
+# main_app/balances.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import Goal, Saving_Account, Checking_Account, Transaction, Balance_Entry, Balance_Snapshot
+from .rollups import SummaryDelta
+from . import caching
+from . import jobs
+
+ZERO = Decimal('0.000')
+
+# The columns of a Transaction that move money around
+BALANCE_FIELDS = ('id', 'user_id', 'transaction_type', 'amount', 'saving_amount', 'checking_amount',
+                  'saving_goal_id', 'transaction_date')
+
+ACCOUNT_MODELS = {
+    Balance_Entry.SAVING: Saving_Account,
+    Balance_Entry.CHECKING: Checking_Account,
+}
+
+
+class BalanceDelta:
+    """
+    Net change to the users' saving accounts, checking accounts and goals caused
+    by a set of transactions. Collect the changes with add()/remove(), then write
+    them with apply(): one UPDATE ... SET balance = balance + delta per account
+    table and one for all goals, so concurrent writers never overwrite each other.
+    Each user has their own accounts, so writers only wait on each other when
+    they touch the same user's balances.
+    Every account change is also recorded in the Balance_Entry journal, and the
+    Monthly_Summary rollup is adjusted in the same atomic block.
+    """
+
+    def __init__(self):
+        # (account_type, user_id) -> amount
+        self.accounts = defaultdict(lambda: ZERO)
+        self.goals = defaultdict(lambda: ZERO)
+        # (account_type, user_id, entry_date, transaction_id) -> amount, for the journal
+        self.entries = defaultdict(lambda: ZERO)
+        self.summary = SummaryDelta()
+        # (goal_id, entry_date) -> amount: where this moves goal history, the owner's forecasts are recomputed
+        self.goal_days = defaultdict(lambda: ZERO)
+
+    def add(self, row, sign=1):
+        # row can be a Transaction or a dict with (some of) the BALANCE_FIELDS keys
+        if not isinstance(row, dict):
+            row = {field: getattr(row, field) for field in BALANCE_FIELDS}
+        self.summary.add(row, sign)
+
+        # Income adds money, expenditure takes it away
+        if row['transaction_type'] == Transaction.INCOME:
+            direction = sign
+        elif row['transaction_type'] == Transaction.EXPENDITURE:
+            direction = -sign
+        else:
+            return
+
+        saving_amount = direction * row['saving_amount']
+        checking_amount = direction * row['checking_amount']
+        user_id, entry_date, transaction_id = row['user_id'], row['transaction_date'], row.get('id')
+
+        # The saving portion goes to the linked goal, or to the user's Saving_Account if there is none
+        if row['saving_goal_id']:
+            self.goals[row['saving_goal_id']] += saving_amount
+            self.goal_days[(row['saving_goal_id'], entry_date)] += saving_amount
+        else:
+            self.accounts[(Balance_Entry.SAVING, user_id)] += saving_amount
+            self.entries[(Balance_Entry.SAVING, user_id, entry_date, transaction_id)] += saving_amount
+        self.accounts[(Balance_Entry.CHECKING, user_id)] += checking_amount
+        self.entries[(Balance_Entry.CHECKING, user_id, entry_date, transaction_id)] += checking_amount
+
+    def remove(self, row):
+        # Undo the effect of a transaction (delete, or the old version of an update)
+        self.add(row, sign=-1)
+
+    def __bool__(self):
+        return bool(any(self.accounts.values()) or any(self.goals.values()))
+
+    def apply(self):
+        now = timezone.now()
+        # savepoint=False: when called from Transaction.save() we are already inside its atomic block
+        with transaction.atomic(savepoint=False):
+            journal = []
+            for account_type, model in ACCOUNT_MODELS.items():
+                nets = {user_id: amount for (kind, user_id), amount in self.accounts.items() if kind == account_type and amount}
+                entries = {key: amount for key, amount in self.entries.items() if key[0] == account_type and amount}
+                # A date change can leave the balance untouched but still move money between days
+                if not (nets or entries):
+                    continue
+                pks = account_pks(model, set(nets) | {key[1] for key in entries})
+                if nets:
+                    cases = [When(pk=pks[user_id], then=Value(amount)) for user_id, amount in nets.items()]
+                    model.objects.filter(pk__in=[pks[user_id] for user_id in nets]).update(
+                        balance=F('balance') + Case(*cases, output_field=DecimalField(max_digits=10, decimal_places=3)),
+                        last_updated=now,
+                    )
+                journal += [
+                    Balance_Entry(account_type=account_type, account_pk=pks[user_id], delta=amount,
+                                  entry_date=entry_date, transaction_id=transaction_id)
+                    for (_, user_id, entry_date, transaction_id), amount in entries.items()
+                ]
+            if journal:
+                Balance_Entry.objects.bulk_create(journal)
+
+            goal_deltas = {goal_id: amount for goal_id, amount in self.goals.items() if amount}
+            if goal_deltas:
+                # Sorted ids so concurrent writers lock goals in the same order
+                cases = [When(pk=goal_id, then=Value(amount)) for goal_id, amount in sorted(goal_deltas.items())]
+                Goal.objects.filter(pk__in=goal_deltas).update(
+                    amount_saved=F('amount_saved') + Case(*cases, output_field=DecimalField(max_digits=10, decimal_places=3)),
+                    updated_at=now,
+                )
+
+            self.summary.apply()
+
+            # A goal can hold other users' transactions: its forecast and cached cards belong to its owner
+            moved_goals = {goal_id for (goal_id, _), amount in self.goal_days.items() if amount}
+            goal_ids = set(goal_deltas) | moved_goals
+            owners = dict(Goal.objects.filter(pk__in=goal_ids).values_list('pk', 'user_id')) if goal_ids else {}
+
+            # Also when the goal totals did not move (a date change still changes the savings velocity)
+            for user_id in sorted({owners[goal_id] for goal_id in moved_goals if goal_id in owners}):
+                jobs.enqueue('forecast_goals', unique=True, user_id=user_id)
+
+            # The UPDATEs above bypass post_save, so tell the cache directly (bulk_create paths rely on this)
+            for user_id in {key[1] for key in self.accounts} | {key[1] for key in self.entries}:
+                caching.invalidate(caching.ACCOUNTS, user_id)
+            transaction_users = {user_id for user_id, _ in self.summary.months}
+            for user_id in transaction_users | set(owners.values()):
+                caching.invalidate(caching.GOALS, user_id)
+            for user_id in transaction_users:
+                caching.invalidate(caching.TRANSACTIONS, user_id)
+
+
+ADJUSTMENT_NAME = 'Balance adjustment'
+
+
+def adjust(user, amount, goal=None, account_type=Balance_Entry.CHECKING):
+    """
+    Move a goal (or the user's saving/checking account) by `amount` when a balance
+    is set by hand. The change is booked as a transaction, so it is journaled,
+    counted in the rollups and snapshots, and reconcile_balances agrees with it.
+    Returns the transaction (None when there is nothing to change).
+    """
+    if not amount:
+        return None
+    to_saving = goal is not None or account_type == Balance_Entry.SAVING
+    adjustment = Transaction(
+        user=user, name=ADJUSTMENT_NAME, saving_goal=goal,
+        transaction_type=Transaction.INCOME if amount > 0 else Transaction.EXPENDITURE,
+        amount=abs(amount),
+        saving_amount=abs(amount) if to_saving else ZERO,
+        checking_amount=ZERO if to_saving else abs(amount),
+    )
+    adjustment.save()
+    return adjustment
+
+
+def account_pks(model, user_ids):
+    # user id -> pk of that user's Saving_Account / Checking_Account, created on first use
+    pks = dict(model.objects.filter(user_id__in=user_ids).values_list('user_id', 'pk'))
+    missing = set(user_ids) - set(pks)
+    if missing:
+        # ignore_conflicts: a concurrent request may be creating the same account
+        model.objects.bulk_create([model(user_id=user_id) for user_id in missing], ignore_conflicts=True)
+        pks.update(model.objects.filter(user_id__in=missing).values_list('user_id', 'pk'))
+    return pks
+
+
+def _grouped(queryset):
+    # Net amounts per (user, day, goal, type) in one GROUP BY, instead of reading every row
+    return (
+        queryset
+        .order_by()
+        .values('user_id', 'transaction_date', 'saving_goal_id', 'transaction_type')
+        .annotate(
+            amount=Sum('amount'),
+            saving_amount=Sum('saving_amount'),
+            checking_amount=Sum('checking_amount'),
+            count=Count('id'),
+        )
+    )
+
+
+def _lock(queryset):
+    # Pin the exact rows first so nothing slips in between the aggregate and the write
+    ids = list(queryset.select_for_update().values_list('pk', flat=True))
+    return Transaction.objects.filter(pk__in=ids)
+
+
+def delete_transactions(queryset):
+    """
+    Delete many transactions at once: one aggregate query for the balance change,
+    one DELETE statement and one set of balance updates, all in one transaction.
+    """
+    with transaction.atomic():
+        queryset = _lock(queryset)
+        delta = BalanceDelta()
+        for group in _grouped(queryset):
+            delta.remove(group)
+        deleted = queryset.delete()
+        delta.apply()
+    return deleted
+
+
+def book_transactions(queryset):
+    """
+    Move the balances, journal and rollups for transactions that were inserted
+    with bulk_create() (which skips Transaction.save()), as if each had been
+    saved: one aggregate query and one set of balance updates.
+    """
+    with transaction.atomic():
+        delta = BalanceDelta()
+        for group in _grouped(queryset):
+            delta.add(group)
+        delta.apply()
+
+
+# Fields that can be changed on many transactions at once (re-categorizing)
+BULK_UPDATE_FIELDS = ('transaction_type', 'saving_goal_id', 'transaction_date')
+
+
+def update_transactions(queryset, **changes):
+    """
+    Change transaction_type, saving_goal_id and/or transaction_date on many
+    transactions with a single UPDATE, moving the balances by the net difference.
+    Returns the number of rows updated.
+    """
+    unknown = set(changes) - set(BULK_UPDATE_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot bulk update {', '.join(sorted(unknown))}.")
+
+    with transaction.atomic():
+        queryset = _lock(queryset)
+        delta = BalanceDelta()
+        for group in _grouped(queryset):
+            delta.remove(group)
+            delta.add({**group, **changes})
+        updated = queryset.update(**changes, updated_at=timezone.now())
+        delta.apply()
+    return updated
+
+
+def expected_balances():
+    """
+    What the balances should be according to the Transaction rows, from one
+    GROUP BY user, saving_goal over the whole table. Returns (saving, checking,
+    goals): saving and checking map user id -> account balance, goals maps
+    goal id -> amount saved.
+    """
+    income = Q(transaction_type=Transaction.INCOME)
+    expenditure = Q(transaction_type=Transaction.EXPENDITURE)
+    rows = (
+        Transaction.objects
+        .order_by()
+        .values('user_id', 'saving_goal_id')
+        .annotate(
+            saving=Sum('saving_amount', filter=income, default=ZERO) - Sum('saving_amount', filter=expenditure, default=ZERO),
+            checking=Sum('checking_amount', filter=income, default=ZERO) - Sum('checking_amount', filter=expenditure, default=ZERO),
+        )
+    )
+    saving, checking, goals = defaultdict(lambda: ZERO), defaultdict(lambda: ZERO), defaultdict(lambda: ZERO)
+    for row in rows:
+        checking[row['user_id']] += row['checking']
+        if row['saving_goal_id']:
+            # Transactions of several users can be linked to one goal
+            goals[row['saving_goal_id']] += row['saving']
+        else:
+            saving[row['user_id']] += row['saving']
+    # SQLite sums decimals as floats, so round back to the column precision
+    return tuple({key: amount.quantize(ZERO) for key, amount in totals.items()} for totals in (saving, checking, goals))
+
+
+def balance_on(account_type, account_pk, on_date, upto_entry_id=None):
+    """
+    Balance of an account at the end of on_date: the latest snapshot at or before
+    that day plus the journal entries it does not cover. Entries are covered by a
+    snapshot when they are dated on or before as_of and were recorded before it
+    (id <= last_entry_id), so back-dated entries added later are still counted.
+    """
+    snapshot = (
+        Balance_Snapshot.objects
+        .filter(account_type=account_type, account_pk=account_pk, as_of__lte=on_date)
+        .order_by('-as_of', '-last_entry_id')
+        .first()
+    )
+    entries = Balance_Entry.objects.filter(account_type=account_type, account_pk=account_pk, entry_date__lte=on_date)
+    if upto_entry_id is not None:
+        entries = entries.filter(id__lte=upto_entry_id)
+
+    balance = ZERO
+    if snapshot:
+        balance = snapshot.balance
+        entries = entries.filter(Q(entry_date__gt=snapshot.as_of) | Q(id__gt=snapshot.last_entry_id))
+    return balance + (entries.aggregate(total=Sum('delta'))['total'] or ZERO)
@@ -0,0 +1,141 @@
+# main_app/benchmarks.py
+
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Goal, Transaction
+from .pagination import keyset_page
+from . import caching
+
+# Most queries a single run of each benchmark may take. Requests query app data, plus the
+# session lookup when sessions are kept in the database (the user always comes from the
+# cache); write counts include the BEGIN/COMMIT that SQLite logs (PostgreSQL runs 2 fewer)
+# and, when a goal moved, looking up its owner and queuing their forecast job (a lookup,
+# plus the insert unless one is already pending).
+SESSION_QUERIES = 0 if settings.SESSION_ENGINE == 'main_app.sessions' else 1
+REQUEST_BUDGETS = {
+    'transaction_list': 3,
+    'transaction_list_cached': 2,
+    'transaction_list_next_page': 2,
+    'goal_index': 1,
+    'goal_index_cached': 0,
+    'accounts_list': 2,
+    'accounts_list_cached': 0,
+}
+QUERY_BUDGETS = {
+    **{name: budget + SESSION_QUERIES for name, budget in REQUEST_BUDGETS.items()},
+    'transaction_create': 12,
+    'transaction_update': 8,
+    'transaction_type_flip': 11,
+    'transaction_delete': 11,
+}
+
+
+class Benchmark:
+    def __init__(self, name):
+        self.name = name
+        self.timings = []
+        self.queries = []
+
+    def measure(self, func):
+        # Queries on every database count (reads may go to the replica)
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            start = time.perf_counter()
+            func()
+            self.timings.append((time.perf_counter() - start) * 1000)
+        self.queries.append(sum(len(queries) for queries in captured))
+
+    def result(self):
+        return {
+            'runs': len(self.timings),
+            'median_ms': round(statistics.median(self.timings), 3),
+            'min_ms': round(min(self.timings), 3),
+            'max_ms': round(max(self.timings), 3),
+            'queries': max(self.queries),
+            'query_budget': QUERY_BUDGETS.get(self.name),
+        }
+
+
+def _get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, f"GET {url} returned {response.status_code}"
+    return response
+
+
+def run_benchmarks(user, repeat=10):
+    """
+    Time the hot paths as `user` and count their queries. Returns
+    {name: {'runs', 'median_ms', 'min_ms', 'max_ms', 'queries', 'query_budget'}}.
+    The write benchmarks delete what they create, so the data is left as it was.
+    """
+    benchmarks = {name: Benchmark(name) for name in QUERY_BUDGETS}
+    client = Client()
+    client.force_login(user)
+
+    # Queries run in turn on this thread, so all of them are counted
+    with override_settings(ALLOWED_HOSTS=['*'], CONCURRENT_QUERIES=False):
+        transaction_list = reverse('transaction-index')
+        _, next_cursor, _ = keyset_page(Transaction.objects.filter(user=user))
+        goal_index = reverse('goal-index')
+        accounts_list = reverse('account-list')
+        # The first request after the login loads the user into the cache, the rest don't query for it
+        _get(client, goal_index)
+
+        for _ in range(repeat):
+            # Cold: the facet counts are recomputed, then served from the cache (also for the next page)
+            caching.invalidate(caching.TRANSACTIONS, user.id)
+            benchmarks['transaction_list'].measure(lambda: _get(client, transaction_list))
+            benchmarks['transaction_list_cached'].measure(lambda: _get(client, transaction_list))
+            if next_cursor:
+                benchmarks['transaction_list_next_page'].measure(lambda: _get(client, f'{transaction_list}?after={next_cursor}'))
+
+            # Cold: the cached lists were just invalidated (outside a transaction this happens immediately)
+            caching.invalidate(caching.GOALS, user.id)
+            benchmarks['goal_index'].measure(lambda: _get(client, goal_index))
+            benchmarks['goal_index_cached'].measure(lambda: _get(client, goal_index))
+
+            caching.invalidate(caching.ACCOUNTS, user.id)
+            benchmarks['accounts_list'].measure(lambda: _get(client, accounts_list))
+            benchmarks['accounts_list_cached'].measure(lambda: _get(client, accounts_list))
+
+    goal = Goal.objects.filter(user=user).first()
+    for _ in range(repeat):
+        transaction = Transaction(
+            name='Benchmark', user=user, saving_goal=goal, transaction_type=Transaction.INCOME,
+            amount=Decimal('10.000'), saving_amount=Decimal('4.000'), checking_amount=Decimal('6.000'),
+            transaction_date=timezone.localdate() - timedelta(days=3),
+        )
+        benchmarks['transaction_create'].measure(transaction.save)
+
+        def update():
+            transaction.amount, transaction.checking_amount = Decimal('12.000'), Decimal('8.000')
+            transaction.save()
+        benchmarks['transaction_update'].measure(update)
+
+        def type_flip():
+            transaction.transaction_type = Transaction.EXPENDITURE
+            transaction.save()
+        benchmarks['transaction_type_flip'].measure(type_flip)
+
+        benchmarks['transaction_delete'].measure(transaction.delete)
+
+    return {name: benchmark.result() for name, benchmark in benchmarks.items() if benchmark.timings}
+
+
+def over_budget(results):
+    # Names of the benchmarks that ran more queries than they are allowed
+    return [
+        name for name, result in results.items()
+        if result['query_budget'] is not None and result['queries'] > result['query_budget']
+    ]
@@ -0,0 +1,80 @@
+# main_app/caching.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Cached lists live under versioned keys: main_app:<name>:<owner>:v<version>.
+# Invalidating a scope just bumps its version number (see signals.py), old entries
+# are never read again and expire on their own. Everything is cached per user
+# (the owner is the user id).
+GOALS = 'goals'
+ACCOUNTS = 'accounts'
+TRANSACTIONS = 'transactions'  # Things derived from the transactions, like the list's facet counts
+
+TIMEOUT = getattr(settings, 'MAIN_APP_CACHE_TIMEOUT', 60 * 60)
+STATS_KEYS = {'hits': 'main_app:stats:hits', 'misses': 'main_app:stats:misses'}
+
+
+def _version_key(scope, owner):
+    return f'main_app:version:{scope}:{owner}'
+
+
+def _new_version():
+    # Time based, so a version that was evicted never comes back to an old number
+    return time.time_ns()
+
+
+def get_version(scope, owner):
+    key = _version_key(scope, owner)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(scope, owner):
+    # Bump after commit, otherwise a concurrent reader could cache the old rows under the new version
+    transaction.on_commit(lambda: _bump_version(scope, owner))
+
+
+def _bump_version(scope, owner):
+    key = _version_key(scope, owner)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Nothing cached for this scope yet (or evicted)
+        cache.set(key, _new_version(), None)
+
+
+def cached_list(scope, owner, name, fetch):
+    """
+    Return fetch() evaluated to a list, served from the cache while nothing in
+    ``scope`` has changed for ``owner``.
+    """
+    key = f'main_app:{name}:{owner}:v{get_version(scope, owner)}'
+    rows = cache.get(key)
+    if rows is not None:
+        _count('hits')
+        return rows
+    _count('misses')
+    rows = list(fetch())
+    cache.set(key, rows, TIMEOUT)
+    return rows
+
+
+def _count(stat):
+    key = STATS_KEYS[stat]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def cache_stats():
+    stats = cache.get_many(STATS_KEYS.values())
+    return {stat: stats.get(key, 0) for stat, key in STATS_KEYS.items()}
@@ -0,0 +1,63 @@
+# main_app/exports.py
+
+import csv
+import json
+import zlib
+
+from .imports import CSV_COLUMNS
+
+CHUNK_SIZE = 2000  # Rows fetched per round-trip (server-side cursor on PostgreSQL)
+FLUSH_SIZE = 64 * 1024  # Bytes buffered before a chunk is sent to the client
+
+# Same columns as the CSV import, so an export can be imported back as-is.
+# Only these columns are selected, the ORM never builds Transaction objects.
+EXPORT_COLUMNS = ['id'] + CSV_COLUMNS
+EXPORT_FIELDS = ['id', 'name', 'description', 'transaction_type', 'amount', 'saving_amount',
+                 'checking_amount', 'transaction_date', 'saving_goal__name']
+
+
+class _Line:
+    # File-like object for csv.writer that hands back the formatted line instead of storing it
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_COLUMNS, row))
+        yield json.dumps(record, default=str, separators=(',', ':')) + '\n'
+
+
+def export_chunks(queryset, file_format='csv', compress=False):
+    """
+    Yield the export of ``queryset`` as bytes, a few KB at a time. Rows are read
+    with .iterator() so memory stays flat however many rows there are, and the
+    first bytes go out as soon as the first rows are fetched.
+    """
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    lines = ndjson_lines(rows) if file_format == 'ndjson' else csv_lines(rows)
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 -> gzip container
+
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_SIZE:
+            data = ''.join(buffer).encode()
+            buffer, size = [], 0
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    data = ''.join(buffer).encode()
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
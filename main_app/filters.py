@@ -0,0 +1,82 @@
+# main_app/filters.py
+
+import hashlib
+from collections import Counter
+
+from django import forms
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+from .models import Transaction
+
+NO_GOAL = 'none'  # ?saving_goal=none: transactions not linked to a goal
+
+
+class TransactionFilterForm(forms.Form):
+    """
+    Query-string filters for the transaction list (and the API). Fields that do not
+    validate are ignored, the others still apply. The queryset being filtered is
+    already limited to the user, so a goal id can't reach anyone else's rows.
+    """
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    transaction_type = forms.ChoiceField(required=False, choices=[('', 'Any type')] + Transaction.TRANSACTION_TYPE_CHOICES)
+    saving_goal = forms.CharField(required=False)
+    amount_min = forms.DecimalField(required=False, min_value=0, max_digits=10, decimal_places=3)
+    amount_max = forms.DecimalField(required=False, min_value=0, max_digits=10, decimal_places=3)
+
+    def clean_saving_goal(self):
+        # NO_GOAL or a goal id; an IntegerField parses the id (str.isdigit() also passes '²')
+        goal = self.cleaned_data['saving_goal']
+        if not goal or goal == NO_GOAL:
+            return goal
+        return forms.IntegerField(min_value=1).clean(goal)
+
+    def cache_key(self):
+        # Same filters, same key (only the values that validated count)
+        self.is_valid()
+        filters = '&'.join(f'{key}={value}' for key, value in sorted(self.cleaned_data.items()) if value not in (None, ''))
+        return hashlib.sha1(filters.encode()).hexdigest()
+
+    def filter(self, queryset):
+        self.is_valid()
+        data = self.cleaned_data
+        # Type and goal filters use the matching (user, type|goal, date, id) index, so a page is
+        # still a range scan in list order (see Transaction.Meta.indexes); the amount range is
+        # checked on the rows that scan reads
+        if data.get('transaction_type'):
+            queryset = queryset.filter(transaction_type=data['transaction_type'])
+        if data.get('saving_goal') == NO_GOAL:
+            queryset = queryset.filter(saving_goal__isnull=True)
+        elif data.get('saving_goal'):
+            queryset = queryset.filter(saving_goal_id=data['saving_goal'])
+        if data.get('date_from'):
+            queryset = queryset.filter(transaction_date__gte=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(transaction_date__lte=data['date_to'])
+        if data.get('amount_min') is not None:
+            queryset = queryset.filter(amount__gte=data['amount_min'])
+        if data.get('amount_max') is not None:
+            queryset = queryset.filter(amount__lte=data['amount_max'])
+        return queryset
+
+
+def facet_rows(queryset):
+    # One GROUP BY type, goal, month over the (filtered) transactions
+    return (
+        queryset
+        .order_by()
+        .annotate(month=TruncMonth('transaction_date'))
+        .values('transaction_type', 'saving_goal_id', 'month')
+        .annotate(count=Count('id'))
+    )
+
+
+def facet_counts(rows):
+    # Fold the facet_rows() three ways: counts per type, per goal and per month
+    types, goals, months = Counter(), Counter(), Counter()
+    for row in rows:
+        types[row['transaction_type']] += row['count']
+        goals[row['saving_goal_id']] += row['count']
+        months[row['month']] += row['count']
+    return {'types': types, 'goals': goals, 'months': months}
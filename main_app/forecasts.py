@@ -0,0 +1,126 @@
+# main_app/forecasts.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.utils import timezone
+
+from .models import Goal, Transaction
+from . import caching
+
+# Savings velocity is fitted on this much recent history
+WINDOW_DAYS = 180
+
+# Further out than this counts as "never" (and would overflow a date)
+MAX_DAYS = 365 * 50
+
+
+def daily_history(user_ids, since, until):
+    # (goal id, day, net saved that day) for every goal of the users, ordered by goal and day:
+    # one GROUP BY. Filtered on the goal's owner, not the transaction's: another user's
+    # transaction can be linked to the goal, and it moves the goal all the same
+    signed = Case(
+        When(transaction_type=Transaction.INCOME, then=F('saving_amount')),
+        When(transaction_type=Transaction.EXPENDITURE, then=-F('saving_amount')),
+        default=Value(Decimal('0.000')),
+        output_field=DecimalField(max_digits=10, decimal_places=3),
+    )
+    return list(
+        Transaction.objects
+        .filter(saving_goal__user_id__in=user_ids, transaction_date__range=(since, until))
+        .order_by('saving_goal_id', 'transaction_date')
+        .values('saving_goal_id', 'transaction_date')
+        .annotate(net=Sum(signed))
+        .values_list('saving_goal_id', 'transaction_date', 'net')
+    )
+
+
+def velocities(goal_ids, rows, today):
+    """
+    Savings per day for each of goal_ids (sorted), from the daily_history() rows:
+    the least-squares slope of each goal's running total over time, fitted for
+    all goals at once. NaN where a goal has fewer than two days of history.
+    """
+    k = len(goal_ids)
+    if not rows:
+        return np.full(k, np.nan)
+    goals, days, nets = zip(*rows)
+    idx = np.searchsorted(goal_ids, np.fromiter(goals, dtype=np.int64, count=len(rows)))
+    x = np.fromiter((day.toordinal() for day in days), dtype=np.float64, count=len(rows)) - today.toordinal()
+    net = np.asarray(nets, dtype=np.float64)
+
+    # Running total within each goal: cumulative sum minus whatever came before the goal's first row
+    total = np.cumsum(net)
+    starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+    before = np.r_[0.0, total][starts]
+    y = total - np.repeat(before, np.diff(np.r_[starts, len(idx)]))
+
+    n = np.bincount(idx, minlength=k).astype(np.float64)
+    sx = np.bincount(idx, x, minlength=k)
+    sy = np.bincount(idx, y, minlength=k)
+    sxy = np.bincount(idx, x * y, minlength=k)
+    sxx = np.bincount(idx, x * x, minlength=k)
+    denominator = n * sxx - sx * sx
+    slope = np.full(k, np.nan)
+    fitted = denominator > 0
+    slope[fitted] = (n * sxy - sx * sy)[fitted] / denominator[fitted]
+    return slope
+
+
+def forecast(goals, rows, today):
+    # goal pk -> (projected_date, on_track) for goals sorted by pk
+    goal_ids = np.array([goal.pk for goal in goals], dtype=np.int64)
+    slope = velocities(goal_ids, rows, today)
+    remaining = np.array([float(goal.target_amount - goal.amount_saved) for goal in goals])
+    target = np.array([goal.target_date.toordinal() for goal in goals], dtype=np.float64)
+
+    done = remaining <= 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days = np.ceil(remaining / slope)
+    reachable = ~done & (slope > 0) & (days <= MAX_DAYS)
+    projected = np.where(reachable, today.toordinal() + days, 0)
+    # Unknown (None) without enough history, otherwise on track when the goal is reached by its date
+    unknown = ~done & np.isnan(slope)
+    on_track = done | (reachable & (projected <= target))
+
+    return {
+        goal.pk: (
+            date.fromordinal(int(projected[i])) if reachable[i] else None,
+            None if unknown[i] else bool(on_track[i]),
+        )
+        for i, goal in enumerate(goals)
+    }
+
+
+def forecast_goals(user_ids):
+    """
+    Recompute projected_date and on_track for every goal of the given users:
+    one query for the goals, one for their history and one bulk UPDATE of the
+    goals whose forecast changed. Returns the number of goals updated.
+    """
+    today = timezone.localdate()
+    goals = list(
+        Goal.objects.filter(user_id__in=user_ids).order_by('pk')
+        .only('pk', 'user_id', 'target_amount', 'amount_saved', 'target_date', 'projected_date', 'on_track')
+    )
+    if not goals:
+        return 0
+    rows = daily_history(user_ids, today - timedelta(days=WINDOW_DAYS), today)
+    forecasts = forecast(goals, rows, today)
+
+    now = timezone.now()
+    changed = []
+    for goal in goals:
+        result = forecasts[goal.pk]
+        if (goal.projected_date, goal.on_track) != result:
+            goal.projected_date, goal.on_track = result
+            goal.updated_at = now  # New version of the cached goal card
+            changed.append(goal)
+    if changed:
+        # bulk_update() skips save() and its signals, so this never queues another forecast
+        Goal.objects.bulk_update(changed, ['projected_date', 'on_track', 'updated_at'], batch_size=500)
+        for user_id in {goal.user_id for goal in changed}:
+            caching.invalidate(caching.GOALS, user_id)
+    return len(changed)
@@ -0,0 +1,66 @@
+# main_app/images.py
+
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+# Goal cards show images at 180px wide, so these cover 1x, 2x and large screens
+WIDTHS = (160, 320, 640)
+DEFAULT_WIDTH = 320
+
+# WebP is much smaller than PNG/JPEG for photos; fall back to JPEG if Pillow was built without it
+if features.check('webp'):
+    FORMAT, EXTENSION, SAVE_OPTIONS = 'WEBP', 'webp', {'quality': 80, 'method': 4}
+else:
+    FORMAT, EXTENSION, SAVE_OPTIONS = 'JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}
+
+
+def variant_name(name, width):
+    # goal_images/trip.png -> goal_images/variants/trip_320.webp
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'variants', f'{stem}_{width}.{EXTENSION}')
+
+
+def generate_variants(name, storage=default_storage):
+    """
+    Write the resized, recompressed copies of an uploaded image next to it.
+    Variants that already exist are left alone, so this is safe to call again.
+    Returns the names of the variants that were written.
+    """
+    missing = [width for width in WIDTHS if not storage.exists(variant_name(name, width))]
+    if not missing:
+        return []
+
+    with storage.open(name, 'rb') as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image.load()
+    if FORMAT == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if FORMAT == 'WEBP' and 'A' in image.getbands() else 'RGB')
+
+    written = []
+    for width in missing:
+        # Never upscale: small originals just get recompressed at their own size
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, FORMAT, **SAVE_OPTIONS)
+        written.append(storage.save(variant_name(name, width), ContentFile(buffer.getvalue())))
+    return written
+
+
+def variant_url(name, width, storage=default_storage):
+    variant = variant_name(name, width)
+    if not storage.exists(variant):
+        # Not built yet (e.g. uploads from before this existed): queue it and show the original meanwhile
+        from .jobs import enqueue
+        enqueue('goal_image_variants', unique=True, name=name)
+        return storage.url(name)
+    return storage.url(variant)
+
+
+def srcset(name, storage=default_storage):
+    return ', '.join(f'{variant_url(name, width, storage)} {width}w' for width in WIDTHS)
@@ -0,0 +1,207 @@
+# main_app/imports.py
+
+import csv
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+from .balances import ZERO, BalanceDelta
+from .models import Goal, Transaction
+
+BATCH_SIZE = 1000
+MAX_AMOUNT = Decimal('9999999.999')  # max_digits=10, decimal_places=3 on the model
+MAX_REPORTED_ERRORS = 50
+
+# Uploads waiting for the background worker; kept outside MEDIA_ROOT so they are never served
+upload_storage = FileSystemStorage(location=getattr(settings, 'IMPORT_UPLOAD_ROOT', settings.BASE_DIR / 'import_uploads'))
+
+# Columns understood in a CSV file. Only amount and transaction_date are required:
+# saving_amount defaults to 0 and checking_amount to the rest of the amount.
+CSV_COLUMNS = ['name', 'description', 'transaction_type', 'amount', 'saving_amount',
+               'checking_amount', 'transaction_date', 'saving_goal']
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.errors = []  # (line number, message), capped at MAX_REPORTED_ERRORS
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        # Stored as the result of a background import (Job.result)
+        return {'created': self.created, 'skipped': self.skipped, 'errors': self.errors}
+
+
+def detect_format(filename):
+    return 'ofx' if filename.lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+
+def parse_csv(stream):
+    # Yields (line number, row dict) one row at a time, the file is never fully loaded
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+
+
+OFX_TAG = re.compile(r'<(/?)(\w+)>([^<\r\n]*)')
+
+
+def parse_ofx(stream):
+    # Minimal streaming reader for the <STMTTRN> blocks of an OFX/QFX bank statement.
+    # Works for both the SGML (v1) and XML (v2) flavours since only leaf tags are read.
+    # Bank statements have no saving/checking split, so everything goes to checking.
+    current = None
+    for line_number, line in enumerate(stream, start=1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if not closing:
+                    current = {'line': line_number}
+                elif current is not None:
+                    yield current.pop('line'), _ofx_row(current)
+                    current = None
+            elif current is not None and not closing and value.strip():
+                current[tag] = value.strip()
+
+
+def _ofx_row(fields):
+    amount = fields.get('TRNAMT', '')
+    is_expenditure = amount.startswith('-')
+    return {
+        'name': fields.get('NAME') or fields.get('PAYEE') or 'Imported Transaction',
+        'description': fields.get('MEMO', ''),
+        'transaction_type': Transaction.EXPENDITURE if is_expenditure else Transaction.INCOME,
+        'amount': amount.lstrip('+-'),
+        'saving_amount': '0',
+        'transaction_date': fields.get('DTPOSTED', '')[:8],
+    }
+
+
+def _decimal(value, default=None):
+    if value in (None, ''):
+        if default is None:
+            raise ValueError("missing amount")
+        return default
+    try:
+        amount = Decimal(value.replace(',', ''))
+        # NaN gets through quantize() and only fails when compared
+        if not amount.is_finite():
+            raise ValueError(f"'{value}' is not a valid amount")
+        amount = amount.quantize(Decimal('0.001'))
+        too_large = abs(amount) > MAX_AMOUNT
+    except InvalidOperation:
+        raise ValueError(f"'{value}' is not a valid amount")
+    if too_large:
+        raise ValueError(f"'{value}' is too large")
+    return amount
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)  # Fast path, much cheaper than strptime
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%d', '%Y%m%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"'{value}' is not a valid date")
+
+
+def _build_transaction(row, user, goals):
+    amount = _decimal(row.get('amount'))
+    saving_amount = _decimal(row.get('saving_amount'), default=ZERO)
+    checking_amount = _decimal(row.get('checking_amount'), default=amount - saving_amount)
+    # Same rule as Transaction.save(), checked here because bulk_create skips save()
+    if saving_amount + checking_amount != amount:
+        raise ValueError("The sum of saving portion and checking portion must equal the total amount.")
+
+    transaction_type = (row.get('transaction_type') or Transaction.INCOME).lower()
+    if transaction_type not in (Transaction.INCOME, Transaction.EXPENDITURE):
+        raise ValueError(f"unknown transaction type '{transaction_type}'")
+
+    goal_id = None
+    goal = row.get('saving_goal')
+    if goal:
+        goal_id = goals.get(goal.lower())
+        if goal_id is None:
+            raise ValueError(f"unknown saving goal '{goal}'")
+
+    return Transaction(
+        name=(row.get('name') or 'Imported Transaction')[:200],
+        description=(row.get('description') or '')[:500],
+        transaction_type=transaction_type,
+        saving_goal_id=goal_id,
+        amount=amount,
+        saving_amount=saving_amount,
+        checking_amount=checking_amount,
+        transaction_date=_date(row.get('transaction_date', '')),
+        user=user,
+    )
+
+
+def import_transactions(rows, user, batch_size=BATCH_SIZE):
+    """
+    Create transactions from (line number, row dict) pairs without going through
+    Transaction.save(). Rows are validated and inserted batch by batch with
+    bulk_create, and each batch applies one summed balance change per account
+    and goal, so the cost is a handful of queries per batch instead of per row.
+    Invalid rows are skipped and reported in the result.
+    """
+    result = ImportResult()
+
+    # Goals can be referenced by id or by name; load the user's goals once
+    goals = {}
+    for goal_id, name in Goal.objects.filter(user=user).values_list('id', 'name'):
+        goals[str(goal_id)] = goal_id
+        goals.setdefault(name.lower(), goal_id)
+
+    batch = []
+    for line, row in rows:
+        try:
+            batch.append(_build_transaction(row, user, goals))
+        except ValueError as e:
+            result.add_error(line, str(e))
+        if len(batch) >= batch_size:
+            result.created += _insert_batch(batch)
+            batch = []
+    if batch:
+        result.created += _insert_batch(batch)
+    return result
+
+
+def _insert_batch(batch):
+    delta = BalanceDelta()
+    for txn in batch:
+        # Without the id the journal gets one entry per account per day instead of per row
+        delta.add({
+            'user_id': txn.user_id,
+            'transaction_type': txn.transaction_type,
+            'amount': txn.amount,
+            'saving_amount': txn.saving_amount,
+            'checking_amount': txn.checking_amount,
+            'saving_goal_id': txn.saving_goal_id,
+            'transaction_date': txn.transaction_date,
+        })
+    with transaction.atomic():
+        Transaction.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        delta.apply()
+    return len(batch)
+
+
+def read_upload(uploaded_file, file_format=None):
+    # Decode an uploaded (binary) file lazily and pick the right parser
+    file_format = file_format or detect_format(uploaded_file.name)
+    stream = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', errors='replace', newline='')
+    return parse_ofx(stream) if file_format == 'ofx' else parse_csv(stream)
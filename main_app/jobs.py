@@ -0,0 +1,124 @@
+# main_app/jobs.py
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# task name -> function, filled in by the @task decorator (see tasks.py)
+TASKS = {}
+
+BACKOFF_BASE = 10  # Seconds before the first retry, doubled on every attempt
+BACKOFF_MAX = 60 * 60
+STALE_AFTER = timedelta(minutes=30)  # A running job this old belongs to a worker that died
+KEEP_FINISHED = timedelta(days=7)  # Done and failed jobs are deleted after this long (see purge_finished)
+
+
+def task(name):
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(task_name, unique=False, run_at=None, max_attempts=5, **payload):
+    """
+    Queue a job and return it. The row is written in the caller's transaction, so
+    a job queued from a view that later fails is rolled back with everything else.
+    With unique=True, an identical job that is still pending is reused instead.
+    """
+    if unique:
+        existing = Job.objects.filter(task=task_name, payload=payload, status=Job.PENDING).first()
+        if existing:
+            return existing
+    return Job.objects.create(task=task_name, payload=payload, run_at=run_at or timezone.now(), max_attempts=max_attempts)
+
+
+def claim_next(worker):
+    # SKIP LOCKED lets any number of workers poll the table without waiting on each other
+    # (SQLite has no row locks; there the whole database is locked for the write instead)
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=Job.PENDING, run_at__lte=now, attempts__lt=F('max_attempts'))
+            .order_by('run_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.locked_at = now
+        job.locked_by = worker
+        job.save(update_fields=['status', 'attempts', 'locked_at', 'locked_by', 'updated_at'])
+    return job
+
+
+def run(job):
+    from . import tasks  # noqa: F401  (registers the tasks)
+
+    try:
+        func = TASKS[job.task]
+    except KeyError:
+        _finish(job, Job.FAILED, f"Unknown task '{job.task}'")
+        return
+
+    try:
+        result = func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s failed (attempt %s/%s)", job, job.attempts, job.max_attempts, exc_info=True)
+        if job.attempts < job.max_attempts:
+            # Exponential backoff: 10s, 20s, 40s, ... capped at an hour
+            delay = min(BACKOFF_BASE * 2 ** (job.attempts - 1), BACKOFF_MAX)
+            _finish(job, Job.PENDING, error, run_at=timezone.now() + timedelta(seconds=delay))
+        else:
+            _finish(job, Job.FAILED, error)
+    else:
+        _finish(job, Job.DONE, '', result=result)
+
+
+def _finish(job, status, error, run_at=None, result=None):
+    job.status = status
+    job.last_error = error
+    job.locked_at = None
+    job.locked_by = ''
+    fields = ['status', 'last_error', 'locked_at', 'locked_by', 'updated_at']
+    if result is not None:
+        job.result = result
+        fields.append('result')
+    if run_at:
+        job.run_at = run_at
+        fields.append('run_at')
+    job.save(update_fields=fields)
+
+
+def requeue_stale():
+    """
+    Jobs left "running" by a worker that crashed go back in the queue, unless
+    they have used up their attempts (an import with max_attempts=1 must never
+    run twice). Returns (requeued, failed).
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - STALE_AFTER)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_at=None, locked_by='', last_error="The worker running this job stopped.", updated_at=now,
+    )
+    requeued = stale.update(status=Job.PENDING, locked_at=None, locked_by='', run_at=now, updated_at=now)
+    return requeued, failed
+
+
+def purge_finished(older_than=KEEP_FINISHED):
+    # Every write that moves a goal queues a job: drop the finished ones once nobody needs them
+    # (the import page shows the latest imports, a week is plenty)
+    deleted, _ = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], updated_at__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -0,0 +1,68 @@
+# main_app/management/commands/benchmark.py
+
+import json
+import subprocess
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from main_app.benchmarks import over_budget, run_benchmarks
+from main_app.models import Transaction
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the transaction list, goal list, account list and Transaction save/delete paths, "
+        "check their query counts against main_app.benchmarks.QUERY_BUDGETS and write the "
+        "results as JSON. Run it on a database filled by `manage.py seed_data`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to run as (default: the owner of the newest transaction)')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            newest = Transaction.objects.order_by('-pk').values_list('user_id', flat=True).first()
+            user = User.objects.filter(pk=newest).first()
+        if user is None:
+            raise CommandError("No user to benchmark as. Run `manage.py seed_data` first or pass --user.")
+
+        results = run_benchmarks(user, repeat=options['repeat'])
+        report = {
+            'commit': current_commit(),
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'user': user.username,
+            'transactions': Transaction.objects.filter(user=user).count(),
+            'results': results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        for name, result in results.items():
+            self.stderr.write(f"{name:<28} {result['median_ms']:>9.2f} ms  {result['queries']:>3} queries")
+        failures = over_budget(results)
+        if failures:
+            raise CommandError(f"Query budget exceeded: {', '.join(failures)}")
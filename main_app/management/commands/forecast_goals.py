@@ -0,0 +1,25 @@
+# main_app/management/commands/forecast_goals.py
+
+from django.core.management.base import BaseCommand
+
+from main_app.forecasts import forecast_goals
+from main_app.models import Goal
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the projected completion date and on-track flag of every goal, a batch of users "
+        "at a time. Transaction writes already queue this per user; run it daily (e.g. from cron) "
+        "so forecasts also follow the calendar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Users per batch (default: 200)')
+
+    def handle(self, *args, **options):
+        user_ids = sorted(set(Goal.objects.values_list('user_id', flat=True)))
+        size = options['batch_size']
+        updated = 0
+        for start in range(0, len(user_ids), size):
+            updated += forecast_goals(user_ids[start:start + size])
+        self.stdout.write(self.style.SUCCESS(f"Updated the forecast of {updated} goal(s) for {len(user_ids)} user(s)."))
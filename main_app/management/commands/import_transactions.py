@@ -0,0 +1,31 @@
+# main_app/management/commands/import_transactions.py
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main_app.imports import BATCH_SIZE, detect_format, import_transactions, parse_csv, parse_ofx
+
+
+class Command(BaseCommand):
+    help = "Bulk import transactions for a user from a CSV or OFX/QFX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or OFX/QFX file to import')
+        parser.add_argument('--user', required=True, help='Username the transactions belong to')
+        parser.add_argument('--format', choices=['csv', 'ofx'], help='File format (default: detect from the file name)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        file_format = options['format'] or detect_format(options['path'])
+        parse = parse_ofx if file_format == 'ofx' else parse_csv
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            result = import_transactions(parse(stream), user, batch_size=options['batch_size'])
+
+        for line, error in result.errors:
+            self.stderr.write(f"Line {line}: {error}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {result.created} transaction(s), skipped {result.skipped}."))
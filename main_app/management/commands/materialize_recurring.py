@@ -0,0 +1,23 @@
+# main_app/management/commands/materialize_recurring.py
+
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from main_app.recurring import materialize
+
+
+class Command(BaseCommand):
+    help = (
+        "Book the due occurrences of every recurring transaction, with one aggregated balance "
+        "update for the whole run. Meant to run periodically (e.g. hourly or nightly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', type=date.fromisoformat,
+                            help='Book occurrences up to this date (YYYY-MM-DD) instead of today')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per INSERT (default: 500)')
+
+    def handle(self, *args, **options):
+        rules, created = materialize(options['until'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Booked {created} transaction(s) from {rules} recurring rule(s)."))
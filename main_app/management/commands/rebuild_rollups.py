@@ -0,0 +1,18 @@
+# main_app/management/commands/rebuild_rollups.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main_app.models import Monthly_Summary
+from main_app.rollups import monthly_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute the Monthly_Summary rollup from all transactions in one grouped query."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            summaries = [Monthly_Summary(**totals) for totals in monthly_totals()]
+            Monthly_Summary.objects.all().delete()
+            Monthly_Summary.objects.bulk_create(summaries, batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(summaries)} monthly summary row(s)."))
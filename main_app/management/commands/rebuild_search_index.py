@@ -0,0 +1,21 @@
+# main_app/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main_app import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Recreate the full-text search index from the transaction and goal tables. Only needed on "
+        "SQLite, where some schema changes drop the triggers that keep it current."
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write("The search index is a generated column on this database, nothing to rebuild.")
+            return
+        with connection.schema_editor() as schema_editor:
+            search.reinstall(schema_editor)
+        self.stdout.write(self.style.SUCCESS("Rebuilt the search index."))
@@ -0,0 +1,95 @@
+# main_app/management/commands/reconcile_balances.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from main_app.balances import ACCOUNT_MODELS, ZERO, BalanceDelta, expected_balances
+from main_app.models import Balance_Entry, Goal
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the saving/checking account balances and every goal's amount saved from the "
+        "transactions (one grouped query) and report the differences. With --fix, the stored "
+        "values are corrected. Meant to run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Correct the balances that differ')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['fix']:
+                # Lock the balances first: writers that are still running wait for us, so their
+                # transaction rows and their balance change both land after the correction
+                for model in ACCOUNT_MODELS.values():
+                    list(model.objects.order_by('pk').select_for_update().values_list('pk', flat=True))
+                list(Goal.objects.order_by('pk').select_for_update().values_list('pk', flat=True))
+
+            saving, checking, goals = expected_balances()
+            delta = BalanceDelta()
+            today = timezone.localdate()
+            differences = 0
+
+            # Accounts without a user (the shared ones from before per-user accounts) are not checked
+            for account_type, expected_by_user in ((Balance_Entry.SAVING, saving), (Balance_Entry.CHECKING, checking)):
+                # Journal totals for every account in one GROUP BY
+                journals = dict(
+                    Balance_Entry.objects
+                    .filter(account_type=account_type)
+                    .order_by()
+                    .values('account_pk')
+                    .annotate(total=Sum('delta'))
+                    .values_list('account_pk', 'total')
+                )
+                accounts = ACCOUNT_MODELS[account_type].objects.filter(user__isnull=False).order_by('pk')
+                seen = set()
+                for account in accounts.values('pk', 'user_id', 'balance').iterator():
+                    user_id = account['user_id']
+                    seen.add(user_id)
+                    label = f"{account_type} account #{account['pk']} (user #{user_id})"
+                    expected = expected_by_user.get(user_id, ZERO)
+                    diff = expected - account['balance']
+                    if diff:
+                        differences += 1
+                        self.report(label, account['balance'], expected)
+                        delta.accounts[(account_type, user_id)] = diff
+
+                    # The journal can drift on its own (e.g. a balance edited in the admin), so it gets
+                    # its own correcting entry rather than the balance difference
+                    journal = journals.get(account['pk'], ZERO).quantize(ZERO)
+                    if expected - journal:
+                        differences += 1
+                        self.report(f"{label} journal", journal, expected)
+                        delta.entries[(account_type, user_id, today, None)] = expected - journal
+
+                # Users with transactions but no account yet: --fix creates it
+                for user_id, expected in expected_by_user.items():
+                    if user_id not in seen and expected:
+                        differences += 1
+                        self.report(f"{account_type} account of user #{user_id} (missing)", ZERO, expected)
+                        delta.accounts[(account_type, user_id)] = expected
+                        delta.entries[(account_type, user_id, today, None)] = expected
+
+            for goal in Goal.objects.order_by('pk').values('pk', 'name', 'amount_saved').iterator():
+                expected = goals.get(goal['pk'], ZERO)
+                diff = expected - goal['amount_saved']
+                if diff:
+                    differences += 1
+                    self.report(f"goal #{goal['pk']} ({goal['name']})", goal['amount_saved'], expected)
+                    delta.goals[goal['pk']] = diff
+
+            if options['fix'] and differences:
+                delta.apply()
+
+        if not differences:
+            self.stdout.write(self.style.SUCCESS("All balances match the transactions."))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {differences} balance(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{differences} balance(s) differ. Run with --fix to correct them."))
+
+    def report(self, label, stored, expected):
+        self.stdout.write(f"{label}: stored {stored}, expected {expected} ({expected - stored:+})")
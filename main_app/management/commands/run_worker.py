@@ -0,0 +1,48 @@
+# main_app/management/commands/run_worker.py
+
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+PURGE_EVERY = 60 * 60  # Seconds between two purges of finished jobs
+
+from main_app import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (main_app.Job). Start as many workers as needed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit once there are no due jobs left')
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        requeued, failed = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+        if failed:
+            self.stdout.write(f"Failed {failed} stale job(s) that had no attempts left.")
+
+        self.stdout.write(f"Worker {worker} started.")
+        next_purge = 0
+        try:
+            while True:
+                if time.monotonic() >= next_purge:
+                    purged = jobs.purge_finished()
+                    if purged:
+                        self.stdout.write(f"Deleted {purged} finished job(s).")
+                    next_purge = time.monotonic() + PURGE_EVERY
+                job = jobs.claim_next(worker)
+                if job is None:
+                    if options['burst']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                jobs.run(job)
+                self.stdout.write(f"{job}")
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Worker {worker} stopped.")
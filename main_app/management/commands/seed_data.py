@@ -0,0 +1,40 @@
+# main_app/management/commands/seed_data.py
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from main_app.seed import SEED_PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate reproducible fake users, goals and transactions for load testing and "
+        "`manage.py benchmark`. Use a throwaway database: millions of rows are fine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--goals', type=int, default=5, help='Goals per user')
+        parser.add_argument('--transactions', type=int, default=100000, help='Transactions in total')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (same seed, same data)')
+        parser.add_argument('--prefix', default='seed', help='Username prefix: <prefix>_0000, <prefix>_0001, ...')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(f"Users named {options['prefix']}_* already exist, pick another --prefix.")
+
+        log = (lambda message: self.stdout.write(message)) if options['verbosity'] > 1 else None
+        seed(
+            users=options['users'],
+            goals_per_user=options['goals'],
+            transactions=options['transactions'],
+            prefix=options['prefix'],
+            random_seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=log,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['users']} users, {options['users'] * options['goals']} goals and "
+            f"{options['transactions']} transactions. Log in as {options['prefix']}_0000 / {SEED_PASSWORD}."
+        ))
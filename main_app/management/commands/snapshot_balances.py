@@ -0,0 +1,80 @@
+# main_app/management/commands/snapshot_balances.py
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from main_app.balances import ACCOUNT_MODELS, balance_on
+from main_app.models import Balance_Entry, Balance_Snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Compact the balance journal into Balance_Snapshot rows, one per account per month end, "
+        "so a historical balance never has to scan more than about a month of entries. "
+        "Meant to run periodically (e.g. nightly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', type=date.fromisoformat,
+                            help='Take a single snapshot at the end of this date (YYYY-MM-DD) instead of every month end')
+
+    def handle(self, *args, **options):
+        last_entry_id = Balance_Entry.objects.aggregate(last=Max('id'))['last']
+        if last_entry_id is None:
+            self.stdout.write("The balance journal is empty, nothing to snapshot.")
+            return
+
+        # Only month ends that are fully in the past
+        until = timezone.localdate().replace(day=1) - timedelta(days=1)
+        created = 0
+        for account_type, model in ACCOUNT_MODELS.items():
+            for account_pk in model.objects.values_list('pk', flat=True).iterator():
+                if options['as_of']:
+                    dates = [options['as_of']]
+                else:
+                    dates = month_ends(self.first_unsnapshotted_day(account_type, account_pk), until)
+
+                # Each snapshot builds on the one before it, so every step is a bounded scan
+                with transaction.atomic():
+                    for as_of in dates:
+                        Balance_Snapshot.objects.create(
+                            account_type=account_type,
+                            account_pk=account_pk,
+                            as_of=as_of,
+                            balance=balance_on(account_type, account_pk, as_of, upto_entry_id=last_entry_id),
+                            last_entry_id=last_entry_id,
+                        )
+                        created += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} balance snapshot(s)."))
+
+    def first_unsnapshotted_day(self, account_type, account_pk):
+        latest = (
+            Balance_Snapshot.objects
+            .filter(account_type=account_type, account_pk=account_pk)
+            .aggregate(latest=Max('as_of'))['latest']
+        )
+        if latest:
+            return latest + timedelta(days=1)
+        first = (
+            Balance_Entry.objects
+            .filter(account_type=account_type, account_pk=account_pk)
+            .aggregate(first=Min('entry_date'))['first']
+        )
+        return first or timezone.localdate()
+
+
+def month_ends(start, until):
+    # Last day of every month from start's month up to and including until
+    month = start.replace(day=1)
+    while True:
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        month_end = next_month - timedelta(days=1)
+        if month_end > until:
+            return
+        yield month_end
+        month = next_month
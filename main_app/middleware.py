@@ -0,0 +1,224 @@
+# main_app/middleware.py
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .routers import REPLICA, RoutingState, current_state
+
+logger = logging.getLogger('main_app.performance')
+
+# Metrics of the request being handled by this thread / task
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_ms = 0.0
+        self.query_count = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.queries = {}  # sql -> [count, total ms], to find the worst offenders
+        self.lock = threading.Lock()  # Async views run queries on several threads at once (aio.concurrently)
+
+    def __call__(self, execute, sql, params, many, context):
+        # Runs around every query of the request (see time_query)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self.lock:
+                self.query_count += 1
+                self.db_ms += elapsed
+                stats = self.queries.setdefault(sql, [0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+
+    def top_queries(self, limit):
+        worst = sorted(self.queries.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [{'sql': sql, 'count': count, 'ms': round(ms, 2)} for sql, (count, ms) in worst]
+
+    @contextmanager
+    def rendering(self):
+        # Only the outermost render is timed: templates rendered inside it are part of its time
+        self.template_depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.template_depth -= 1
+            if not self.template_depth:
+                self.template_ms += (time.perf_counter() - start) * 1000
+
+
+def time_query(execute, sql, params, many, context):
+    # Installed on every connection when it opens (signals.py), on whichever thread that is:
+    # queries count towards the request in current_metrics, if one is being timed
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def hook_connection(connection):
+    # First in line, so a connection opened inside an execute_wrapper() block pops that wrapper, not this one
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header (db, tpl, view and total time, plus the query
+    count) to every response and logs requests slower than SLOW_REQUEST_MS with
+    their most expensive SQL. Disabled unless SERVER_TIMING is set, in which case
+    Django drops the middleware entirely; otherwise the query and template hooks
+    (time_query, templating.TimedDjangoTemplates) only cost a context variable
+    lookup. Handles sync and async requests alike.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        self.top = getattr(settings, 'SLOW_REQUEST_TOP_QUERIES', 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Otherwise Django would run process_view on a worker thread for every request
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total_ms = (time.perf_counter() - metrics.started) * 1000
+        if metrics.view_started is not None:
+            metrics.view_ms = (time.perf_counter() - metrics.view_started) * 1000
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.db_ms:.1f};desc="{metrics.query_count} queries"',
+            f'tpl;dur={metrics.template_ms:.1f}',
+            f'view;dur={metrics.view_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        if total_ms >= self.slow_ms:
+            logger.warning('Slow request %s', json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 1),
+                'view_ms': round(metrics.view_ms, 1),
+                'db_ms': round(metrics.db_ms, 1),
+                'template_ms': round(metrics.template_ms, 1),
+                'queries': metrics.query_count,
+                'top_queries': metrics.top_queries(self.top),
+            }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _view_started()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        _view_started()
+
+
+def _view_started():
+    # View time runs from here to the end of the response (TemplateResponses render after the view returns)
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.view_started = time.perf_counter()
+
+
+# Clients that wrote recently carry this cookie; their reads stay on the primary until it expires
+PIN_COOKIE = 'save_wise_primary'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets the reads of GET/HEAD requests go to the replica (see
+    routers.PrimaryReplicaRouter), except for a client that wrote within the
+    last REPLICA_PIN_SECONDS: it reads from the primary, so it sees its own
+    writes even if the replica lags behind. Handles sync and async views alike.
+    Disabled when there is no 'replica' database.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if REPLICA not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.state(request)
+        token = current_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_state.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = self.state(request)
+        token = current_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_state.reset(token)
+        return self.finish(response, state)
+
+    def state(self, request):
+        return RoutingState(use_replica=request.method in READ_METHODS and PIN_COOKIE not in request.COOKIES)
+
+    def finish(self, response, state):
+        if response.streaming and not response.is_async:
+            # Exports are read after the view has returned, while the response is sent
+            response.streaming_content = _with_state(response.streaming_content, state)
+        if state.wrote:
+            response.set_cookie(PIN_COOKIE, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
+
+
+def _with_state(chunks, state):
+    previous = current_state.get()
+    current_state.set(state)
+    try:
+        yield from chunks
+    finally:
+        current_state.set(previous)
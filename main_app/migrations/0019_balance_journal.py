@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:49
+
+from django.db import migrations, models
+
+
+def add_opening_entries(apps, schema_editor):
+    # Start the journal with the balances the accounts already hold
+    Balance_Entry = apps.get_model('main_app', 'Balance_Entry')
+    for account_type, model_name in (('saving', 'Saving_Account'), ('checking', 'Checking_Account')):
+        for account in apps.get_model('main_app', model_name).objects.all():
+            if account.balance:
+                Balance_Entry.objects.create(
+                    account_type=account_type,
+                    account_pk=account.pk,
+                    delta=account.balance,
+                    entry_date=account.last_updated.date(),
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0018_transaction_user_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Balance_Entry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_type', models.CharField(choices=[('saving', 'Saving'), ('checking', 'Checking')], max_length=20)),
+                ('account_pk', models.BigIntegerField()),
+                ('delta', models.DecimalField(decimal_places=3, max_digits=10)),
+                ('entry_date', models.DateField()),
+                ('transaction_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account_type', 'account_pk', 'entry_date'], name='balance_entry_account_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Balance_Snapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_type', models.CharField(choices=[('saving', 'Saving'), ('checking', 'Checking')], max_length=20)),
+                ('account_pk', models.BigIntegerField()),
+                ('as_of', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=3, max_digits=10)),
+                ('last_entry_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account_type', 'account_pk', '-as_of'], name='balance_snapshot_account_idx')],
+            },
+        ),
+        migrations.RunPython(add_opening_entries, migrations.RunPython.noop),
+    ]
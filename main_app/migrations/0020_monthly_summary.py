@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:54
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0019_balance_journal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Monthly_Summary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('income', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=12)),
+                ('expenditure', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=12)),
+                ('saving_amount', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=12)),
+                ('checking_amount', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=12)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'month'), name='monthly_summary_user_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:09
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+ZERO = Decimal('0.000')
+
+
+def create_user_accounts(apps, schema_editor):
+    # Every user gets their own accounts, holding the net of their own transactions, and
+    # journal entries per day so historical balances work for them too. The old shared
+    # accounts keep their rows and journal (with no user), so nothing is lost.
+    User = apps.get_model('auth', 'User')
+    Transaction = apps.get_model('main_app', 'Transaction')
+    Balance_Entry = apps.get_model('main_app', 'Balance_Entry')
+    models_by_type = {
+        'saving': apps.get_model('main_app', 'Saving_Account'),
+        'checking': apps.get_model('main_app', 'Checking_Account'),
+    }
+
+    income = Q(transaction_type='income')
+    expenditure = Q(transaction_type='expenditure')
+    no_goal = Q(saving_goal__isnull=True)
+    days = (
+        Transaction.objects
+        .order_by()
+        .values('user_id', 'transaction_date')
+        .annotate(
+            saving=Sum('saving_amount', filter=income & no_goal, default=ZERO) - Sum('saving_amount', filter=expenditure & no_goal, default=ZERO),
+            checking=Sum('checking_amount', filter=income, default=ZERO) - Sum('checking_amount', filter=expenditure, default=ZERO),
+        )
+    )
+    totals = {account_type: defaultdict(lambda: ZERO) for account_type in models_by_type}
+    entries = []
+    for day in days.iterator():
+        for account_type in models_by_type:
+            amount = Decimal(day[account_type]).quantize(ZERO)
+            if amount:
+                totals[account_type][day['user_id']] += amount
+                entries.append((account_type, day['user_id'], day['transaction_date'], amount))
+
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    pks = {}
+    for account_type, model in models_by_type.items():
+        model.objects.bulk_create(
+            [model(user_id=user_id, balance=totals[account_type][user_id]) for user_id in user_ids],
+            batch_size=1000,
+        )
+        pks[account_type] = dict(model.objects.filter(user__isnull=False).values_list('user_id', 'pk'))
+
+    Balance_Entry.objects.bulk_create(
+        [
+            Balance_Entry(account_type=account_type, account_pk=pks[account_type][user_id], delta=amount, entry_date=entry_date)
+            for account_type, user_id, entry_date, amount in entries
+        ],
+        batch_size=1000,
+    )
+
+
+def remove_user_accounts(apps, schema_editor):
+    Balance_Entry = apps.get_model('main_app', 'Balance_Entry')
+    for account_type, model_name in (('saving', 'Saving_Account'), ('checking', 'Checking_Account')):
+        accounts = apps.get_model('main_app', model_name).objects.filter(user__isnull=False)
+        Balance_Entry.objects.filter(account_type=account_type, account_pk__in=accounts.values('pk')).delete()
+        accounts.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0021_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checking_account',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='checking_account', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='saving_account',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saving_account', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(create_user_accounts, remove_user_accounts),
+    ]
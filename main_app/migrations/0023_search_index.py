@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:20
+
+from django.db import migrations
+
+# A frozen copy of the DDL in main_app/search.py as it was when this migration was written,
+# so later changes to search.py don't change what this migration does
+
+# Tables that get a search index, and their (name, description) columns
+SEARCHABLE = {
+    'main_app_transaction': ('name', 'description'),
+    'main_app_goal': ('name', 'description'),
+}
+
+
+# PostgreSQL: a generated tsvector column with a GIN index. The database keeps it current on
+# every INSERT/UPDATE, including bulk_create() and queryset.update(), which skip save().
+
+def _postgresql_install(table, columns):
+    name, description = columns
+    return [
+        f"""ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce({name}, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce({description}, '')), 'B')
+            ) STORED""",
+        f"CREATE INDEX {table}_search_idx ON {table} USING GIN (search_vector)",
+    ]
+
+
+def _postgresql_uninstall(table, columns):
+    return [f"ALTER TABLE {table} DROP COLUMN search_vector"]
+
+
+# SQLite (local development): an FTS5 table over the same columns, kept current by triggers.
+
+def _sqlite_install(table, columns):
+    name, description = columns
+    fts = f'{table}_fts'
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {name}, {description}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+            )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {name}, {description}) VALUES (new.id, new.{name}, new.{description});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {name}, {description}) VALUES ('delete', old.id, old.{name}, old.{description});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {name}, {description} ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {name}, {description}) VALUES ('delete', old.id, old.{name}, old.{description});
+                INSERT INTO {fts}(rowid, {name}, {description}) VALUES (new.id, new.{name}, new.{description});
+            END""",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _sqlite_uninstall(table, columns):
+    fts = f'{table}_fts'
+    return [f"DROP TABLE IF EXISTS {fts}"] + [
+        f"DROP TRIGGER IF EXISTS {fts}_{event}" for event in ('insert', 'delete', 'update')
+    ]
+
+
+BACKENDS = {
+    'postgresql': (_postgresql_install, _postgresql_uninstall),
+    'sqlite': (_sqlite_install, _sqlite_uninstall),
+}
+
+
+def install_search(apps, schema_editor):
+    # Other databases fall back to icontains
+    statements = BACKENDS.get(schema_editor.connection.vendor)
+    if statements:
+        for table, columns in SEARCHABLE.items():
+            for sql in statements[0](table, columns):
+                schema_editor.execute(sql)
+
+
+def uninstall_search(apps, schema_editor):
+    statements = BACKENDS.get(schema_editor.connection.vendor)
+    if statements:
+        for table, columns in SEARCHABLE.items():
+            for sql in statements[1](table, columns):
+                schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0022_per_user_accounts'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
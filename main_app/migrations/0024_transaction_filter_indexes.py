@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0023_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', '-transaction_date', '-id'], name='txn_user_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('saving_goal__isnull', False)), fields=['user', 'saving_goal', '-transaction_date', '-id'], name='txn_user_goal_date_idx'),
+        ),
+    ]
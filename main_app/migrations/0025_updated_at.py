@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+# A frozen copy of the SQLite search DDL (see 0023_search_index), so later changes to
+# main_app/search.py don't change what this migration does
+SEARCHABLE = {
+    'main_app_transaction': ('name', 'description'),
+    'main_app_goal': ('name', 'description'),
+}
+
+
+def _sqlite_install(table, columns):
+    name, description = columns
+    fts = f'{table}_fts'
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {name}, {description}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+            )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {name}, {description}) VALUES (new.id, new.{name}, new.{description});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {name}, {description}) VALUES ('delete', old.id, old.{name}, old.{description});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {name}, {description} ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {name}, {description}) VALUES ('delete', old.id, old.{name}, old.{description});
+                INSERT INTO {fts}(rowid, {name}, {description}) VALUES (new.id, new.{name}, new.{description});
+            END""",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _sqlite_uninstall(table, columns):
+    fts = f'{table}_fts'
+    return [f"DROP TABLE IF EXISTS {fts}"] + [
+        f"DROP TRIGGER IF EXISTS {fts}_{event}" for event in ('insert', 'delete', 'update')
+    ]
+
+
+def reinstall_search(apps, schema_editor):
+    # Adding the columns rebuilds the tables on SQLite, which drops the search triggers.
+    # The PostgreSQL column survives any schema change
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, columns in SEARCHABLE.items():
+        for sql in _sqlite_uninstall(table, columns) + _sqlite_install(table, columns):
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0024_transaction_filter_indexes'),
+    ]
+
+    operations = [
+        # Runs last when migrating backwards (removing the columns rebuilds the tables again)
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search),
+        migrations.AddField(
+            model_name='goal',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(reinstall_search, migrations.RunPython.noop),
+    ]
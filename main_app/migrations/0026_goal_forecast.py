@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0025_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='on_track',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='projected_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
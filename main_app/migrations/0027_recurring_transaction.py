@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:21
+
+import django.db.models.deletion
+import django.utils.timezone
+import main_app.models
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0026_goal_forecast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recurring_Transaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.CharField(blank=True, max_length=500, null=True)),
+                ('transaction_type', models.CharField(choices=[('income', 'Income'), ('expenditure', 'Expenditure')], default='income', max_length=20)),
+                ('amount', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=10)),
+                ('saving_amount', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=10)),
+                ('checking_amount', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=10)),
+                ('interval', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly'), ('yearly', 'Yearly')], default='monthly', max_length=20)),
+                ('start_date', models.DateField(default=django.utils.timezone.localdate)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('next_date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('saving_goal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recurring_transactions', to='main_app.goal')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['next_date'], name='recurring_next_date_idx')],
+            },
+            bases=(main_app.models.TrackChangesMixin, models.Model),
+        ),
+    ]
@@ -1,11 +1,107 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.fields.files import FieldFile
+from django.db.models.functions import Cast, Greatest, Least, Round
 from django.urls import reverse
-from datetime import date
+from calendar import monthrange
+from datetime import date, timedelta
 from django.utils import timezone
 from decimal import Decimal  # Ensure we are importing Decimal
 from django.contrib.auth.models import User
 
-class Goal(models.Model):
+class TrackChangesMixin:
+    """
+    Remembers the column values a row was loaded with, so save() only writes
+    the columns that changed (and skips the UPDATE when nothing did) and
+    callers can see what the row looked like before without reading it again.
+    Instances that were not loaded from the database save as usual.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # The reloaded columns are what the row holds now (also when a deferred field is loaded)
+        attnames = None if fields is None else {self._meta.get_field(name).attname for name in fields}
+        self._remember_values(attnames)
+
+    def _remember_values(self, attnames=None):
+        # Deferred fields are left out: they were not loaded, so they cannot have changed
+        values = {
+            field.attname: self._tracked_value(field.attname)
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in self.__dict__
+            and (attnames is None or field.attname in attnames)
+        }
+        if attnames is None:
+            self.original = values
+        elif getattr(self, 'original', None) is not None:
+            self.original.update(values)
+
+    def _tracked_value(self, attname):
+        value = getattr(self, attname)
+        return value.name if isinstance(value, FieldFile) else value
+
+    @property
+    def changed_fields(self):
+        # Columns that differ from the loaded row (None if the instance was not loaded from the database)
+        original = getattr(self, 'original', None)
+        if original is None:
+            return None
+        return [attname for attname, value in original.items() if self._tracked_value(attname) != value]
+
+    def save(self, *args, **kwargs):
+        changed = self.changed_fields
+        if changed is not None and not self._state.adding and not args and not (
+            kwargs.get('update_fields') or kwargs.get('force_insert')
+        ):
+            if not changed:
+                return
+            auto_now = [field.attname for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)]
+            kwargs['update_fields'] = list(dict.fromkeys(changed + auto_now))
+        super().save(*args, **kwargs)
+        self._remember_values()
+
+
+class GoalQuerySet(models.QuerySet):
+    def with_progress(self):
+        # Percentage saved (whole number, 0-100) and a status derived from it, computed
+        # in SQL so listing goals needs no per-row Python arithmetic
+        # Clamped while still a decimal and cast last: a goal saved far past a tiny target
+        # would otherwise overflow the integer cast (int4 on PostgreSQL)
+        ratio = F('amount_saved') * 100 / F('target_amount')
+        percent = Greatest(Least(ratio, Value(Decimal(100))), Value(Decimal(0)), output_field=models.DecimalField())
+        return self.annotate(
+            progress=Case(
+                When(target_amount__lte=0, then=Value(0)),
+                default=Cast(Round(percent), models.IntegerField()),
+                output_field=models.IntegerField(),
+            ),
+            progress_status=Case(
+                When(amount_saved__lte=0, then=Value(Goal.STATUS_LABELS[Goal.NOT_STARTED])),
+                When(target_amount__gt=0, amount_saved__gte=F('target_amount'), then=Value(Goal.STATUS_LABELS[Goal.COMPLETED])),
+                default=Value(Goal.STATUS_LABELS[Goal.ONGOING]),
+                output_field=models.CharField(),
+            ),
+        )
+
+
+class Goal(TrackChangesMixin, models.Model):
+    NOT_STARTED = 'not_started'
+    ONGOING = 'ongoing'
+    COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (NOT_STARTED, 'Not Started'),
+        (ONGOING, 'Ongoing'),
+        (COMPLETED, 'Completed'),
+    ]
+    STATUS_LABELS = dict(STATUS_CHOICES)
+
     image = models.ImageField(upload_to='goal_images/', blank=True, null=True)
     name = models.CharField(max_length=200)
     description = models.CharField(max_length=500)
@@ -14,15 +110,25 @@ class Goal(models.Model):
     target_date = models.DateField()
     status = models.CharField(max_length=100)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)  # Also bumped by the bulk UPDATEs, it keys the cached goal card
+    # Written by forecasts.forecast_goals() in the background, never on page views.
+    # on_track is None while there is too little history to tell
+    projected_date = models.DateField(blank=True, null=True)
+    on_track = models.BooleanField(blank=True, null=True)
+
+    objects = GoalQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
 
 # Add the account model
-class Saving_Account(models.Model):
+# Every user has their own saving and checking account, so balance updates from
+# different users never wait on the same row. Accounts from before this have no user.
+class Saving_Account(TrackChangesMixin, models.Model):
     balance = models.DecimalField(max_digits=10, decimal_places=3, default=Decimal('0.000'))  # Use Decimal
     last_updated = models.DateTimeField(auto_now=True)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='saving_account', blank=True, null=True)
 
     def __str__(self):
          return f"Savings Account — {self.balance:.3f}"
@@ -32,9 +138,10 @@ class Saving_Account(models.Model):
 
 
 # Add the Checking Account model
-class Checking_Account(models.Model):
+class Checking_Account(TrackChangesMixin, models.Model):
     balance = models.DecimalField(max_digits=10, decimal_places=3, default=Decimal('0.000'))  # Use Decimal
     last_updated = models.DateTimeField(auto_now=True)  # Auto-updates on every save
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='checking_account', blank=True, null=True)
 
     def __str__(self):
         return f"Checking Account — {self.balance:.3f}"
@@ -44,7 +151,7 @@ class Checking_Account(models.Model):
 
 
 # Add the Transaction model
-class Transaction(models.Model):
+class Transaction(TrackChangesMixin, models.Model):
     INCOME = 'income'
     EXPENDITURE = 'expenditure'
     TRANSACTION_TYPE_CHOICES = [
@@ -61,137 +168,248 @@ class Transaction(models.Model):
     saving_amount = models.DecimalField(max_digits=10, decimal_places=3, default=Decimal('0.000'))  # Use Decimal
     checking_amount = models.DecimalField(max_digits=10, decimal_places=3, default=Decimal('0.000'))  # Use Decimal
     transaction_date = models.DateField(default=timezone.localdate)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)  # Also bumped by the bulk UPDATEs, it keys the cached transaction card
+
+    class Meta:
+        indexes = [
+            # Backs the keyset pagination of the transaction list (newest first)
+            models.Index(fields=['user', '-transaction_date', '-id'], name='txn_user_date_id_idx'),
+            # The same order within one type or one goal, for the list filters: a filtered page
+            # (with or without a date range) is a range scan of one of these
+            models.Index(fields=['user', 'transaction_type', '-transaction_date', '-id'], name='txn_user_type_date_idx'),
+            models.Index(fields=['user', 'saving_goal', '-transaction_date', '-id'], name='txn_user_goal_date_idx',
+                         condition=models.Q(saving_goal__isnull=False)),
+        ]
 
     def save(self, *args, **kwargs):
-        # If it's an update, get the old transaction data
-        if self.pk:
-            old_transaction = Transaction.objects.get(pk=self.pk)
-            old_saving_amount = old_transaction.saving_amount
-            old_checking_amount = old_transaction.checking_amount
-            old_transaction_type = old_transaction.transaction_type
-        else:
-            old_saving_amount = Decimal('0.000')  # Initialize as Decimal
-            old_checking_amount = Decimal('0.000')
-            old_transaction_type = None
+        from .balances import BALANCE_FIELDS, BalanceDelta
 
         # Ensure that the sum of saving_amount and checking_amount equals the total amount
         if (self.saving_amount + self.checking_amount) != self.amount:
             raise ValueError("The sum of saving portion and checking portion must equal the total amount.")
 
-        # Handle saving account balance update if needed
-        saving_account = Saving_Account.objects.first()  # Assuming one Saving Account
-
-        # Handle Checking Account balance update if needed
-        checking_account = Checking_Account.objects.first()  # Assuming one Checking Account
-
-        # **Check if Checking_Account exists, create if not**
-        if not checking_account:
-            checking_account = Checking_Account.objects.create(balance=Decimal('0.000'))  # Create Checking_Account with default balance 0
-
-        # Handle income logic for Saving_Account or Checking_Account
-        if self.transaction_type == self.INCOME:
-            if self.saving_goal:
-                # If a goal is selected, add the saving_amount to the goal's amount_saved
-                self.saving_goal.amount_saved += (self.saving_amount - old_saving_amount)  # Use Decimal
-                self.saving_goal.save()  # Save updated goal amount_saved
-            else:
-                # If no goal is selected, add the saving_amount to the Saving_Account balance
-                if saving_account:
-                    saving_account.balance += (self.saving_amount - old_saving_amount)  # Use Decimal
-                    saving_account.save()
-
-            # Income logic for Checking_Account
-            if checking_account:
-                checking_account.balance += (self.checking_amount - old_checking_amount)  # Use Decimal
-                checking_account.save()
-
-        # Handle expenditure logic for Saving_Account or Checking_Account
-        elif self.transaction_type == self.EXPENDITURE:
-            if self.saving_goal:
-                # If a goal is selected, subtract the saving_amount from the goal's amount_saved
-                self.saving_goal.amount_saved -= (self.saving_amount - old_saving_amount)  # Use Decimal
-                self.saving_goal.save()  # Save updated goal amount_saved
-            else:
-                # If no goal is selected, subtract the saving_amount from the Saving_Account balance
-                if saving_account:
-                    saving_account.balance -= (self.saving_amount - old_saving_amount)  # Use Decimal
-                    saving_account.save()
-
-            # Expenditure logic for Checking_Account
-            if checking_account:
-                checking_account.balance -= (self.checking_amount - old_checking_amount)  # Use Decimal
-                checking_account.save()
-
-        # If the transaction type changes (from income to expenditure or vice versa), adjust the balance
-        if old_transaction_type != self.transaction_type:
-            # If it was income and now it's expenditure, adjust Checking_Account balance
-            if old_transaction_type == self.INCOME:
-                if checking_account:
-                    checking_account.balance -= old_checking_amount  # Use Decimal
-                    checking_account.balance -= self.checking_amount  # Use Decimal
-                    checking_account.save()
-
-            # If it was expenditure and now it's income, adjust Checking_Account balance
-            elif old_transaction_type == self.EXPENDITURE:
-                if checking_account:
-                    checking_account.balance += old_checking_amount  # Use Decimal
-                    checking_account.balance += self.checking_amount  # Use Decimal
-                    checking_account.save()
-
-        # Now save the transaction
-        super().save(*args, **kwargs)
-
-
-    def delete(self, *args, **kwargs):
-        # Case 1: If the transaction is linked to a goal
-        if self.saving_goal:
-            # If the transaction is income, subtract the saving_amount from the goal's amount_saved
-            if self.transaction_type == self.INCOME:
-                self.saving_goal.amount_saved -= self.saving_amount
-            # If the transaction is expenditure, add the saving_amount to the goal's amount_saved
-            elif self.transaction_type == self.EXPENDITURE:
-                self.saving_goal.amount_saved += self.saving_amount
-            
-            # Save the updated goal's amount_saved after the change
-            self.saving_goal.save()
-
-        # Case 2: If the transaction is not linked to any goal, update the Saving_Account balance
-        if not self.saving_goal:
-            try:
-                # Fetch the first available Saving_Account (assuming only one exists)
-                saving_account = Saving_Account.objects.first()
-                if saving_account:
-                    # If the transaction is income, subtract the saving_amount from the Saving_Account balance
-                    if self.transaction_type == self.INCOME:
-                        saving_account.balance -= self.saving_amount
-                    # If the transaction is expenditure, add the saving_amount to the Saving_Account balance
-                    elif self.transaction_type == self.EXPENDITURE:
-                        saving_account.balance += self.saving_amount
-
-                    # Save the updated Saving_Account balance
-                    saving_account.save()
+        with transaction.atomic():
+            delta = BalanceDelta()
+            balances_changed = True
+            # If it's an update, undo what the stored version of the row did first.
+            # This also covers type flips and moving the transaction to another goal.
+            # Rows loaded from the database remember their old values, so there is no extra read
+            if self.pk:
+                changed = self.changed_fields
+                tracked = changed is not None and set(BALANCE_FIELDS) - {'id'} <= set(self.original)
+                if not tracked:
+                    old_transaction = Transaction.objects.filter(pk=self.pk).values(*BALANCE_FIELDS).first()
+                elif set(changed) & set(BALANCE_FIELDS):
+                    old_transaction = {**self.original, 'id': self.pk}
                 else:
-                    # If no Saving_Account exists, log the issue or handle accordingly
-                    print("No Saving_Account found. Skipping balance update.")
+                    old_transaction, balances_changed = None, False  # e.g. only the name changed
+                if old_transaction:
+                    delta.remove(old_transaction)
 
-            except Saving_Account.DoesNotExist:
-                # If no Saving_Account exists, log the issue
-                print("Saving_Account does not exist. Cannot update balance.")
+            # Now save the transaction (so new rows have an id for the journal)
+            # and apply the net change to the balances
+            super().save(*args, **kwargs)
+            if balances_changed:
+                delta.add(self)
+                delta.apply()
 
-        # Update the Checking Account balance
-        checking_account = Checking_Account.objects.first()  # Assuming one Checking Account
-        if checking_account:
-            if self.transaction_type == self.INCOME:
-                checking_account.balance -= self.checking_amount  # Use Decimal for income
-            elif self.transaction_type == self.EXPENDITURE:
-                checking_account.balance += self.checking_amount  # Use Decimal for expenditure
-            checking_account.save()
+    def delete(self, *args, **kwargs):
+        from .balances import BalanceDelta
 
-        # Now, proceed with deleting the transaction after the balance updates
-        super().delete(*args, **kwargs)
+        with transaction.atomic():
+            # Reverse the transaction's effect on the goal / Saving_Account and the Checking_Account
+            delta = BalanceDelta()
+            delta.remove(self)
+            result = super().delete(*args, **kwargs)
+            delta.apply()
+        return result
 
     def __str__(self):
         return self.name
 
     def get_absolute_url(self):
         return reverse("transaction-detail", kwargs={"pk": self.id})
+
+
+# A rule that books the same transaction every day/week/month/year (salary, rent, subscriptions).
+# Occurrences are only stored once they are due (`manage.py materialize_recurring`);
+# everything before next_date has been booked, upcoming ones are computed when shown.
+class Recurring_Transaction(TrackChangesMixin, models.Model):
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    MONTHLY = 'monthly'
+    YEARLY = 'yearly'
+    INTERVAL_CHOICES = [
+        (DAILY, 'Daily'),
+        (WEEKLY, 'Weekly'),
+        (MONTHLY, 'Monthly'),
+        (YEARLY, 'Yearly'),
+    ]
+
+    name = models.CharField(max_length=200)
+    description = models.CharField(max_length=500, blank=True, null=True)
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPE_CHOICES, default=Transaction.INCOME)
+    saving_goal = models.ForeignKey('Goal', on_delete=models.SET_NULL, blank=True, null=True, related_name='recurring_transactions')
+    amount = models.DecimalField(max_digits=10, decimal_places=3, default=Decimal('0.000'))
+    saving_amount = models.DecimalField(max_digits=10, decimal_places=3, default=Decimal('0.000'))
+    checking_amount = models.DecimalField(max_digits=10, decimal_places=3, default=Decimal('0.000'))
+    interval = models.CharField(max_length=20, choices=INTERVAL_CHOICES, default=MONTHLY)
+    start_date = models.DateField(default=timezone.localdate)
+    end_date = models.DateField(blank=True, null=True)  # Last day an occurrence may fall on
+    next_date = models.DateField()  # First occurrence not booked yet
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The scheduler's "what is due" scan
+            models.Index(fields=['next_date'], name='recurring_next_date_idx'),
+        ]
+
+    def clean(self):
+        if self.end_date and self.start_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': "The end date cannot be before the start date."})
+
+    def following(self, day):
+        # The occurrence after `day`. Months keep the start day where they can (the 31st falls on the 30th, 28th/29th)
+        if self.interval == self.DAILY:
+            return day + timedelta(days=1)
+        if self.interval == self.WEEKLY:
+            return day + timedelta(weeks=1)
+        year, month = divmod(day.month - 1 + (12 if self.interval == self.YEARLY else 1), 12)
+        year, month = day.year + year, month + 1
+        return date(year, month, min(self.start_date.day, monthrange(year, month)[1]))
+
+    def occurrences(self, until, start=None):
+        # Occurrence dates from `start` (default next_date) up to and including `until` and end_date
+        day = start or self.next_date
+        if self.end_date and self.end_date < until:
+            until = self.end_date
+        while day <= until:
+            yield day
+            day = self.following(day)
+
+    def save(self, *args, **kwargs):
+        if self.saving_amount + self.checking_amount != self.amount:
+            raise ValueError("The sum of saving portion and checking portion must equal the total amount.")
+        changed = self.changed_fields
+        if self._state.adding or self.next_date is None:
+            self.next_date = self.start_date
+        elif changed and {'start_date', 'interval'} & set(changed):
+            # New schedule: carry on from where the old one stopped, without booking anything twice
+            booked_until = max(self.start_date, self.next_date)
+            day = self.start_date
+            while day < booked_until:
+                day = self.following(day)
+            self.next_date = day
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_interval_display().lower()})"
+
+    def get_absolute_url(self):
+        return reverse('recurring-index')
+
+
+# Append-only journal of every change made to the account balances.
+# Rows are only ever inserted; a historical balance is the latest Balance_Snapshot
+# plus the entries recorded after it (see balances.balance_on).
+class Balance_Entry(models.Model):
+    SAVING = 'saving'
+    CHECKING = 'checking'
+    ACCOUNT_TYPE_CHOICES = [
+        (SAVING, 'Saving'),
+        (CHECKING, 'Checking'),
+    ]
+
+    account_type = models.CharField(max_length=20, choices=ACCOUNT_TYPE_CHOICES)
+    account_pk = models.BigIntegerField()
+    delta = models.DecimalField(max_digits=10, decimal_places=3)
+    entry_date = models.DateField()  # The transaction_date the change belongs to
+    transaction_id = models.BigIntegerField(blank=True, null=True)  # Plain id: entries outlive deleted transactions
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account_type', 'account_pk', 'entry_date'], name='balance_entry_account_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_account_type_display()} {self.delta:+.3f} on {self.entry_date}"
+
+
+# Balance of one account at the end of as_of, covering journal entries up to last_entry_id
+class Balance_Snapshot(models.Model):
+    account_type = models.CharField(max_length=20, choices=Balance_Entry.ACCOUNT_TYPE_CHOICES)
+    account_pk = models.BigIntegerField()
+    as_of = models.DateField()
+    balance = models.DecimalField(max_digits=10, decimal_places=3)
+    last_entry_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account_type', 'account_pk', '-as_of'], name='balance_snapshot_account_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_account_type_display()} {self.balance:.3f} as of {self.as_of}"
+
+
+# Per-user, per-month totals kept up to date by Transaction.save()/delete(),
+# so dashboards read a few rows instead of summing every transaction.
+# saving_amount / checking_amount are net flows: income adds, expenditure subtracts.
+class Monthly_Summary(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()  # First day of the month
+    income = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal('0.000'))
+    expenditure = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal('0.000'))
+    saving_amount = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal('0.000'))
+    checking_amount = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal('0.000'))
+    transaction_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='monthly_summary_user_month'),
+        ]
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.user} {self.month:%Y-%m}"
+
+
+# Background work queued from requests and run by `manage.py run_worker` (see jobs.py)
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # Not picked up before this time (retry backoff)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(blank=True, null=True)  # What the task returned, for the page that queued it
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Workers look for the oldest due pending job
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,76 @@
+# main_app/pagination.py
+
+import base64
+from datetime import date
+
+from django.db.models import Q
+
+
+# Keyset ("seek") pagination on (transaction_date, id), newest first.
+# Instead of OFFSET, every page starts right after the last row of the previous
+# page, so the database walks the (user, transaction_date, id) index and the cost
+# of a page does not grow with how deep into the history the user is.
+
+def encode_cursor(row_date, row_id):
+    raw = f"{row_date.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    # Returns (date, id) or None if the cursor is missing or has been tampered with
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        row_date, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return date.fromisoformat(row_date), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, after=None, before=None, per_page=20, date_field='transaction_date'):
+    """
+    Return (rows, next_cursor, prev_cursor) for one page of ``queryset``.
+
+    ``after`` moves forward (older rows), ``before`` moves back (newer rows).
+    One extra row is fetched to know whether another page exists, so a page is
+    always a single query.
+    """
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before)
+
+    if before_key:
+        # Walk the index in the opposite direction, then flip the rows back
+        row_date, row_id = before_key
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__gt': row_date}) | Q(**{date_field: row_date, 'id__gt': row_id})
+        ).order_by(date_field, 'id')
+        rows = list(queryset[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next, has_prev = True, has_more
+    else:
+        if after_key:
+            row_date, row_id = after_key
+            queryset = queryset.filter(
+                Q(**{f'{date_field}__lt': row_date}) | Q(**{date_field: row_date, 'id__lt': row_id})
+            )
+        queryset = queryset.order_by(f'-{date_field}', '-id')
+        rows = list(queryset[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = after_key is not None
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first, last = rows[0], rows[-1]
+        if has_next:
+            next_cursor = encode_cursor(_value(last, date_field), _value(last, 'id'))
+        if has_prev:
+            prev_cursor = encode_cursor(_value(first, date_field), _value(first, 'id'))
+    return rows, next_cursor, prev_cursor
+
+
+def _value(row, field):
+    # Rows can be model instances or dicts from values()
+    return row[field] if isinstance(row, dict) else getattr(row, field)
@@ -0,0 +1,64 @@
+# main_app/recurring.py
+
+import heapq
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .balances import BalanceDelta
+from .models import Recurring_Transaction, Transaction
+
+
+def due(until):
+    # Rules with an occurrence on or before `until` that has not been booked yet
+    return Recurring_Transaction.objects.filter(next_date__lte=until).filter(
+        Q(end_date__isnull=True) | Q(next_date__lte=F('end_date'))
+    )
+
+
+def materialize(until=None, batch_size=500):
+    """
+    Book every due occurrence of every rule up to `until` (default today) as a
+    Transaction: the rows go in with bulk_create(), in batches, and their effect
+    on the balances, goals and rollups is applied as one aggregated update.
+    Rules are locked and moved on in the same transaction, so a scheduler that
+    runs twice (or two at once) never books an occurrence twice.
+    Returns (rules, transactions) booked.
+    """
+    until = until or timezone.localdate()
+    with transaction.atomic():
+        # SKIP LOCKED: rules another scheduler is booking right now are left to it
+        rules = list(due(until).select_for_update(skip_locked=True).order_by('pk'))
+        transactions = []
+        for rule in rules:
+            for day in rule.occurrences(until):
+                transactions.append(Transaction(
+                    name=rule.name, description=rule.description, transaction_type=rule.transaction_type,
+                    saving_goal_id=rule.saving_goal_id, amount=rule.amount, saving_amount=rule.saving_amount,
+                    checking_amount=rule.checking_amount, transaction_date=day, user_id=rule.user_id,
+                ))
+                rule.next_date = rule.following(day)
+        if not rules:
+            return 0, 0
+
+        Transaction.objects.bulk_create(transactions, batch_size=batch_size)
+        Recurring_Transaction.objects.bulk_update(rules, ['next_date'], batch_size=batch_size)
+        # bulk_create skips Transaction.save(): apply the balances for the whole run at once
+        delta = BalanceDelta()
+        for booked in transactions:
+            delta.add(booked)
+        delta.apply()
+    return len(rules), len(transactions)
+
+
+def upcoming(rules, until, limit=None):
+    # (date, rule) for the occurrences not booked yet up to `until`, soonest first.
+    # Computed from the rules, nothing is stored for future dates
+    def stream(rule):
+        for day in rule.occurrences(until):
+            yield day, rule.pk, rule
+
+    merged = ((day, rule) for day, _, rule in heapq.merge(*map(stream, rules)))
+    return list(islice(merged, limit))
@@ -0,0 +1,88 @@
+# main_app/rollups.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, IntegerField, Q, Sum, Count, Value, When
+from django.db.models.functions import TruncMonth
+
+from .models import Monthly_Summary, Transaction
+
+ZERO = Decimal('0.000')
+
+SUMMARY_FIELDS = ('income', 'expenditure', 'saving_amount', 'checking_amount', 'transaction_count')
+
+
+def _empty_totals():
+    return {'income': ZERO, 'expenditure': ZERO, 'saving_amount': ZERO, 'checking_amount': ZERO, 'transaction_count': 0}
+
+
+class SummaryDelta:
+    """
+    Change to the Monthly_Summary rows caused by a set of transactions, keyed by
+    (user_id, month). Used by BalanceDelta, so every path that moves balances
+    keeps the rollup in step: an update removes the old row and adds the new one.
+    """
+
+    def __init__(self):
+        self.months = defaultdict(_empty_totals)
+
+    def add(self, row, sign=1):
+        # row is a dict with transaction_type, amount, saving_amount, checking_amount, transaction_date and user_id
+        # (or the sums of a group of transactions plus a count)
+        totals = self.months[(row['user_id'], row['transaction_date'].replace(day=1))]
+        if row['transaction_type'] == Transaction.INCOME:
+            totals['income'] += sign * row['amount']
+            direction = sign
+        elif row['transaction_type'] == Transaction.EXPENDITURE:
+            totals['expenditure'] += sign * row['amount']
+            direction = -sign
+        else:
+            direction = 0
+        totals['saving_amount'] += direction * row['saving_amount']
+        totals['checking_amount'] += direction * row['checking_amount']
+        totals['transaction_count'] += sign * row.get('count', 1)  # Grouped rows carry their size
+
+    def apply(self):
+        changed = {key: totals for key, totals in self.months.items() if any(totals.values())}
+        if not changed:
+            return
+
+        # Make sure every month row exists, then add all the deltas in a single UPDATE
+        Monthly_Summary.objects.bulk_create(
+            [Monthly_Summary(user_id=user_id, month=month) for user_id, month in changed],
+            ignore_conflicts=True,
+        )
+        rows = Q()
+        for user_id, month in changed:
+            rows |= Q(user_id=user_id, month=month)
+
+        updates = {}
+        for field in SUMMARY_FIELDS:
+            output_field = IntegerField() if field == 'transaction_count' else DecimalField(max_digits=12, decimal_places=3)
+            cases = [
+                When(user_id=user_id, month=month, then=Value(totals[field]))
+                for (user_id, month), totals in sorted(changed.items())
+            ]
+            updates[field] = F(field) + Case(*cases, default=Value(0), output_field=output_field)
+        Monthly_Summary.objects.filter(rows).update(**updates)
+
+
+def monthly_totals(queryset=None):
+    # One grouped pass over the transactions: a dict per (user, month)
+    queryset = Transaction.objects.all() if queryset is None else queryset
+    income = Q(transaction_type=Transaction.INCOME)
+    expenditure = Q(transaction_type=Transaction.EXPENDITURE)
+    return (
+        queryset
+        .annotate(month=TruncMonth('transaction_date'))
+        .order_by()
+        .values('user_id', 'month')
+        .annotate(
+            income=Sum('amount', filter=income, default=ZERO),
+            expenditure=Sum('amount', filter=expenditure, default=ZERO),
+            saving_amount=Sum('saving_amount', filter=income, default=ZERO) - Sum('saving_amount', filter=expenditure, default=ZERO),
+            checking_amount=Sum('checking_amount', filter=income, default=ZERO) - Sum('checking_amount', filter=expenditure, default=ZERO),
+            transaction_count=Count('id'),
+        )
+    )
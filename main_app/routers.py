@@ -0,0 +1,81 @@
+# main_app/routers.py
+
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+# Apps whose reads always go to the primary: a session read from a lagging replica logs the user out
+PRIMARY_APPS = {'sessions'}
+
+REPLICA_RETRY_SECONDS = 30  # How long an unreachable replica is left alone before trying it again
+
+
+class RoutingState:
+    # Per request: may reads use the replica, and has the request written anything yet
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+# Set by ReplicaRoutingMiddleware for the request being handled (None outside requests:
+# commands, the job worker and tests read from the primary)
+current_state = ContextVar('current_state', default=None)
+
+_replica_down_until = 0.0
+
+
+def replica_available():
+    # Connects (or checks the persistent connection) once; a failure sends reads to the primary for a while
+    global _replica_down_until
+    if time.monotonic() < _replica_down_until:
+        return False
+    try:
+        connections[REPLICA].ensure_connection()
+    except DatabaseError:
+        logger.warning("Replica unreachable, reading from the primary for %ss", REPLICA_RETRY_SECONDS, exc_info=True)
+        _replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        return False
+    return True
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes go to the primary. Reads go to the replica when the request allows it
+    (GET/HEAD without a recent write by the same client, see
+    ReplicaRoutingMiddleware), nothing has been written in the request so far,
+    and no transaction is open on the primary. Without a 'replica' database
+    everything uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = current_state.get()
+        if (
+            state is None or not state.use_replica or state.wrote
+            or REPLICA not in settings.DATABASES
+            or model._meta.app_label in PRIMARY_APPS
+            or connections[PRIMARY].in_atomic_block  # Read-after-write inside a transaction
+        ):
+            return PRIMARY
+        return REPLICA if replica_available() else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = current_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both databases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db == PRIMARY
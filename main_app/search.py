@@ -0,0 +1,153 @@
+# main_app/search.py
+
+import re
+
+from django.db import connection
+
+from .models import Goal, Transaction
+
+MAX_TERMS = 8
+
+# Tables that get a search index, and the text columns that go into it (name ranks above description)
+SEARCHABLE = {
+    Transaction: ('name', 'description'),
+    Goal: ('name', 'description'),
+}
+
+
+# PostgreSQL: a generated tsvector column with a GIN index. The database keeps it current on
+# every INSERT/UPDATE, including bulk_create() and queryset.update(), which skip save().
+
+def _postgresql_install(table, columns):
+    name, description = columns
+    return [
+        f"""ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce({name}, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce({description}, '')), 'B')
+            ) STORED""",
+        f"CREATE INDEX {table}_search_idx ON {table} USING GIN (search_vector)",
+    ]
+
+
+def _postgresql_uninstall(table, columns):
+    return [f"ALTER TABLE {table} DROP COLUMN search_vector"]
+
+
+# SQLite (local development): an FTS5 table over the same columns, kept current by triggers.
+# Django rebuilds SQLite tables on some schema changes, which drops the triggers: migrations
+# that do so reinstall them (with their own frozen copy of this DDL, like 0023_search_index),
+# `manage.py rebuild_search_index` does the same by hand with reinstall().
+
+def _sqlite_install(table, columns):
+    name, description = columns
+    fts = f'{table}_fts'
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {name}, {description}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+            )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {name}, {description}) VALUES (new.id, new.{name}, new.{description});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {name}, {description}) VALUES ('delete', old.id, old.{name}, old.{description});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {name}, {description} ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {name}, {description}) VALUES ('delete', old.id, old.{name}, old.{description});
+                INSERT INTO {fts}(rowid, {name}, {description}) VALUES (new.id, new.{name}, new.{description});
+            END""",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _sqlite_uninstall(table, columns):
+    fts = f'{table}_fts'
+    return [f"DROP TABLE IF EXISTS {fts}"] + [
+        f"DROP TRIGGER IF EXISTS {fts}_{event}" for event in ('insert', 'delete', 'update')
+    ]
+
+
+BACKENDS = {
+    'postgresql': (_postgresql_install, _postgresql_uninstall),
+    'sqlite': (_sqlite_install, _sqlite_uninstall),
+}
+
+
+def install(schema_editor):
+    # Other databases fall back to icontains
+    statements = BACKENDS.get(schema_editor.connection.vendor)
+    if statements:
+        for model, columns in SEARCHABLE.items():
+            for sql in statements[0](model._meta.db_table, columns):
+                schema_editor.execute(sql)
+
+
+def uninstall(schema_editor):
+    statements = BACKENDS.get(schema_editor.connection.vendor)
+    if statements:
+        for model, columns in SEARCHABLE.items():
+            for sql in statements[1](model._meta.db_table, columns):
+                schema_editor.execute(sql)
+
+
+def reinstall(schema_editor):
+    # Only SQLite needs it, the PostgreSQL column survives any schema change
+    if schema_editor.connection.vendor == 'sqlite':
+        uninstall(schema_editor)
+        install(schema_editor)
+
+
+def terms(query):
+    # Plain words only, so user input can never inject query syntax
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def _ranked_ids(model, user, words, limit):
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        # Every word must match, the last one as a prefix ("vaca" finds "vacation")
+        tsquery = ' & '.join(words[:-1] + [f'{words[-1]}:*'])
+        sql = f"""
+            SELECT id FROM {table}
+            WHERE user_id = %s AND search_vector @@ to_tsquery('english', %s)
+            ORDER BY ts_rank(search_vector, to_tsquery('english', %s)) DESC, id DESC
+            LIMIT %s
+        """
+        params = [user.pk, tsquery, tsquery, limit]
+    elif connection.vendor == 'sqlite':
+        match = ' AND '.join([f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*'])
+        # bm25 weights: a hit in the name counts more than one in the description
+        sql = f"""
+            SELECT {table}.id FROM {table}_fts JOIN {table} ON {table}.id = {table}_fts.rowid
+            WHERE {table}_fts MATCH %s AND {table}.user_id = %s
+            ORDER BY bm25({table}_fts, 4.0, 1.0), {table}.id DESC
+            LIMIT %s
+        """
+        params = [match, user.pk, limit]
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search(queryset, user, query, limit):
+    words = terms(query)
+    if not words:
+        return []
+    ids = _ranked_ids(queryset.model, user, words, limit)
+    if ids is None:
+        # No full-text support on this database: a (slow) scan, still scoped to the user
+        for word in words:
+            queryset = queryset.filter(name__icontains=word) | queryset.filter(description__icontains=word)
+        return list(queryset.filter(user=user)[:limit])
+    rows = queryset.filter(user=user).in_bulk(ids)
+    return [rows[pk] for pk in ids if pk in rows]
+
+
+def search_transactions(user, query, limit=50):
+    # The user's transactions matching every word of query, best match first
+    return _search(Transaction.objects.select_related('saving_goal'), user, query, limit)
+
+
+def search_goals(user, query, limit=20):
+    return _search(Goal.objects.with_progress(), user, query, limit)
@@ -0,0 +1,107 @@
+# main_app/seed.py
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .balances import book_transactions
+from .forecasts import forecast_goals
+from .models import Goal, Saving_Account, Checking_Account, Transaction
+
+SEED_PASSWORD = 'savewise-seed'
+HISTORY_DAYS = 3 * 365
+
+# Expenditure is 4x as common but income is 4x as large, so balances wander around zero
+# instead of growing with the row count (the balance columns only hold 10 digits)
+INCOME_SHARE = 0.2
+EXPENDITURE_MAX = 200
+INCOME_MAX = 800
+
+# Users booked per balance update. The rollup UPDATE ORs one condition per (user, month):
+# 10 users x 37 months stays well under SQLite's expression depth limit of 1000
+BOOK_USERS = 10
+
+NAMES = {
+    Transaction.INCOME: ['Salary', 'Freelance', 'Refund', 'Gift', 'Interest'],
+    Transaction.EXPENDITURE: ['Groceries', 'Rent', 'Fuel', 'Coffee', 'Internet', 'Dinner', 'Gym', 'Books'],
+}
+
+
+def _money(rng, top):
+    return Decimal(rng.randint(100, top * 100)) / 100
+
+
+def seed(users=10, goals_per_user=5, transactions=100000, prefix='seed', random_seed=1, batch_size=5000, log=None):
+    """
+    Fill the database with reproducible fake data: users (password SEED_PASSWORD),
+    goals and transactions spread over the last three years. The same arguments
+    always produce the same rows. Transactions are bulk inserted, then booked
+    on the seeded users' balances and monthly rollups a few users at a time;
+    nobody else's rows are touched.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(random_seed)
+    today = timezone.localdate()
+
+    password = make_password(SEED_PASSWORD)  # Hashing is slow, so every seeded user shares the hash
+    User.objects.bulk_create([
+        User(username=f'{prefix}_{i:04d}', password=password) for i in range(users)
+    ], batch_size=batch_size)
+    user_ids = list(User.objects.filter(username__startswith=f'{prefix}_').order_by('pk').values_list('pk', flat=True))
+    log(f"{len(user_ids)} users")
+
+    Goal.objects.bulk_create([
+        Goal(
+            name=f'Goal {i + 1}',
+            description='Seeded goal',
+            target_amount=Decimal(rng.randint(5, 200) * 100),
+            target_date=today + timedelta(days=rng.randint(30, 1500)),
+            status=rng.choice(Goal.STATUS_CHOICES)[0],
+            user_id=user_id,
+        )
+        for user_id in user_ids for i in range(goals_per_user)
+    ], batch_size=batch_size)
+    goals = {user_id: [] for user_id in user_ids}
+    for goal_id, user_id in Goal.objects.filter(user_id__in=user_ids).values_list('pk', 'user_id'):
+        goals[user_id].append(goal_id)
+    log(f"{users * goals_per_user} goals")
+
+    # Empty accounts for now, the balances are filled in at the end
+    Saving_Account.objects.bulk_create([Saving_Account(user_id=user_id) for user_id in user_ids], batch_size=batch_size)
+    Checking_Account.objects.bulk_create([Checking_Account(user_id=user_id) for user_id in user_ids], batch_size=batch_size)
+
+    created = 0
+    while created < transactions:
+        batch = []
+        for _ in range(min(batch_size, transactions - created)):
+            user_id = rng.choice(user_ids)
+            income = rng.random() < INCOME_SHARE
+            transaction_type = Transaction.INCOME if income else Transaction.EXPENDITURE
+            amount = _money(rng, INCOME_MAX if income else EXPENDITURE_MAX)
+            saving_amount = (amount * rng.choice((0, 0, 10, 25, 50)) / 100).quantize(Decimal('0.01'))
+            batch.append(Transaction(
+                name=rng.choice(NAMES[transaction_type]),
+                transaction_type=transaction_type,
+                saving_goal_id=rng.choice(goals[user_id]) if goals[user_id] and rng.random() < 0.3 else None,
+                amount=amount,
+                saving_amount=saving_amount,
+                checking_amount=amount - saving_amount,
+                transaction_date=today - timedelta(days=rng.randint(0, HISTORY_DAYS)),
+                user_id=user_id,
+            ))
+        Transaction.objects.bulk_create(batch)
+        created += len(batch)
+        log(f"{created} transactions")
+
+    # bulk_create skips Transaction.save(), so book the rows and forecast the goals here
+    for start in range(0, len(user_ids), BOOK_USERS):
+        batch = user_ids[start:start + BOOK_USERS]
+        book_transactions(Transaction.objects.filter(user_id__in=batch))
+        forecast_goals(batch)
+    log("balances, rollups and forecasts")
+    return user_ids
+
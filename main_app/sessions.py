@@ -0,0 +1,58 @@
+# main_app/sessions.py
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+
+# After a session row is written, changes to the session only go to the cache for this
+# many seconds; the next save after that writes the row again. 0 writes every save through.
+DB_WRITE_INTERVAL = getattr(settings, 'MAIN_APP_SESSION_DB_WRITE_INTERVAL', 0)
+
+
+class SessionStore(cached_db.SessionStore):
+    """
+    Sessions read from the cache (the database only when the cache lost them)
+    and written behind to the database: new sessions (a login cycles the key)
+    are stored right away, later changes at most every DB_WRITE_INTERVAL
+    seconds. A session changed since its last database write and then evicted
+    from the cache comes back as that last written state.
+    """
+
+    @property
+    def db_written_key(self):
+        return f'{self.cache_key}:db'
+
+    async def adb_written_key(self):
+        return f'{await self.acache_key()}:db'
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        # add() only succeeds when the row wasn't written within the interval
+        if not must_create and DB_WRITE_INTERVAL and not self._cache.add(self.db_written_key, True, DB_WRITE_INTERVAL):
+            self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+            return
+        super().save(must_create)
+        if must_create and DB_WRITE_INTERVAL:
+            self._cache.set(self.db_written_key, True, DB_WRITE_INTERVAL)
+
+    async def asave(self, must_create=False):
+        if self.session_key is None:
+            return await self.acreate()
+        if not must_create and DB_WRITE_INTERVAL and not await self._cache.aadd(await self.adb_written_key(), True, DB_WRITE_INTERVAL):
+            await self._cache.aset(await self.acache_key(), self._session, await self.aget_expiry_age())
+            return
+        await super().asave(must_create)
+        if must_create and DB_WRITE_INTERVAL:
+            await self._cache.aset(await self.adb_written_key(), True, DB_WRITE_INTERVAL)
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        super().delete(session_key)
+        if session_key is not None:
+            self._cache.delete(f'{self.cache_key_prefix}{session_key}:db')
+
+    async def adelete(self, session_key=None):
+        session_key = session_key or self.session_key
+        await super().adelete(session_key)
+        if session_key is not None:
+            await self._cache.adelete(f'{self.cache_key_prefix}{session_key}:db')
@@ -0,0 +1,68 @@
+# main_app/signals.py
+
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import auth
+from . import caching
+from . import jobs
+from . import middleware
+from .models import Goal, Saving_Account, Checking_Account, Transaction
+
+
+# Any write to these models makes the cached lists that show them stale
+
+@receiver([post_save, post_delete], sender=Goal)
+def goal_changed(sender, instance, **kwargs):
+    caching.invalidate(caching.GOALS, instance.user_id)
+    # Deleting a goal unlinks its transactions without saving them
+    caching.invalidate(caching.TRANSACTIONS, instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Saving_Account)
+@receiver([post_save, post_delete], sender=Checking_Account)
+def account_changed(sender, instance, **kwargs):
+    caching.invalidate(caching.ACCOUNTS, instance.user_id)
+
+
+# Only post_save: every delete path goes through BalanceDelta.apply(), which invalidates,
+# and a post_delete receiver would make Django load each row on bulk deletes
+@receiver(post_save, sender=Transaction)
+def transaction_changed(sender, instance, **kwargs):
+    # A transaction moves money on the accounts and on the user's goals
+    caching.invalidate(caching.GOALS, instance.user_id)
+    caching.invalidate(caching.ACCOUNTS, instance.user_id)
+
+
+@receiver(post_save, sender=Goal)
+def goal_image_variants(sender, instance, update_fields=None, **kwargs):
+    # Build the thumbnails in the background right after upload, off the request
+    # (saves that only wrote other columns leave the image alone)
+    if instance.image and (update_fields is None or 'image' in update_fields):
+        jobs.enqueue('goal_image_variants', unique=True, name=instance.image.name)
+
+
+# Goal columns the forecast depends on
+FORECAST_FIELDS = {'target_amount', 'amount_saved', 'target_date'}
+
+
+@receiver(post_save, sender=Goal)
+def goal_forecast(sender, instance, update_fields=None, **kwargs):
+    # New goals and changed targets get a fresh projection (forecasts.forecast_goals)
+    if update_fields is None or FORECAST_FIELDS & set(update_fields):
+        jobs.enqueue('forecast_goals', unique=True, user_id=instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    # Logins (last_login), password changes and deactivation all save the user row
+    auth.forget_user(instance.pk)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    # Every connection, on every thread (async views query from others): ServerTimingMiddleware
+    # counts the queries of the request it is timing, the hook does nothing otherwise
+    middleware.hook_connection(connection)
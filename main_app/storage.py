@@ -0,0 +1,63 @@
+# main_app/storage.py
+
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only the .gz files are written
+    brotli = None
+
+# Text assets worth compressing (images are compressed already)
+COMPRESSIBLE = ('.css', '.js', '.svg', '.map', '.json', '.txt', '.html', '.xml', '.ico')
+
+# Files smaller than this gain nothing from compression
+MIN_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    `manage.py collectstatic` writes every file under a content-hashed name
+    (css/base.3f2a9c1e.css) listed in staticfiles.json, plus .gz and .br copies
+    of the text files next to it. The web server can then send those files
+    as-is with a far-future Cache-Control header: a changed file gets a new name.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed):
+            if hashed_name.endswith(COMPRESSIBLE):
+                for compressed in self._compress(hashed_name):
+                    yield hashed_name, compressed, True
+
+    def stored_name(self, name):
+        # A template pointing at a file that is not in static/ gets the plain URL (a 404 for
+        # that one file) instead of failing the whole page
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def _compress(self, name):
+        with self.open(name) as f:
+            content = f.read()
+        if len(content) < MIN_SIZE:
+            return
+        encoders = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoders.append(('.br', lambda data: brotli.compress(data, quality=11)))
+        for suffix, encode in encoders:
+            compressed = encode(content)
+            # Only keep it if it is actually smaller
+            if len(compressed) < len(content):
+                path = self.path(name + suffix)
+                with open(path, 'wb') as f:
+                    f.write(compressed)
+                yield name + suffix
@@ -0,0 +1,56 @@
+# main_app/tasks.py
+
+import io
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.utils import timezone
+
+from .forecasts import forecast_goals as run_forecast
+from .images import generate_variants
+from .imports import import_transactions as run_import, parse_csv, parse_ofx, upload_storage
+from .jobs import task
+from .models import Goal
+from . import caching
+
+
+# Background tasks, queued with jobs.enqueue('<name>', **payload)
+
+@task('goal_image_variants')
+def goal_image_variants(name):
+    generate_variants(name, default_storage)
+    # The goal cards (and cached goal lists) still point at the original image: re-render them
+    goals = Goal.objects.filter(image=name)
+    goals.update(updated_at=timezone.now())
+    for user_id in set(goals.values_list('user_id', flat=True)):
+        caching.invalidate(caching.GOALS, user_id)
+
+
+@task('forecast_goals')
+def forecast_goals(user_id):
+    # Queued by every write that moves money on one of the user's goals
+    run_forecast([user_id])
+
+
+@task('rebuild_rollups')
+def rebuild_rollups():
+    call_command('rebuild_rollups')
+
+
+@task('snapshot_balances')
+def snapshot_balances():
+    call_command('snapshot_balances')
+
+
+@task('import_transactions')
+def import_transactions(path, user_id, file_format):
+    # Large uploads are stored by TransactionImport and imported here. The counts and
+    # skipped rows are kept on the job, the import page shows them
+    user = User.objects.get(pk=user_id)
+    parse = parse_ofx if file_format == 'ofx' else parse_csv
+    with upload_storage.open(path, 'rb') as upload:
+        stream = io.TextIOWrapper(upload, encoding='utf-8-sig', errors='replace', newline='')
+        result = run_import(parse(stream), user)
+    upload_storage.delete(path)
+    return result.as_dict()
@@ -0,0 +1,19 @@
+# main_app/templatetags/goal_images.py
+
+from django import template
+
+from main_app.images import DEFAULT_WIDTH, srcset, variant_url
+
+register = template.Library()
+
+
+# {% image_url goal.image 320 %} -> URL of the 320px variant
+@register.simple_tag
+def image_url(image, width=DEFAULT_WIDTH):
+    return variant_url(image.name, width, image.storage)
+
+
+# {% image_srcset goal.image %} -> "…_160.webp 160w, …_320.webp 320w, …_640.webp 640w"
+@register.simple_tag
+def image_srcset(image):
+    return srcset(image.name, image.storage)
@@ -1,3 +1,951 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction as db_transaction
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .benchmarks import QUERY_BUDGETS, over_budget, run_benchmarks
+from .balances import balance_on, delete_transactions, expected_balances, update_transactions
+from .filters import NO_GOAL, TransactionFilterForm
+from .forecasts import forecast_goals
+from .imports import import_transactions, parse_csv, upload_storage
+from .middleware import ServerTimingMiddleware, current_metrics
+from .pagination import encode_cursor, keyset_page
+from .models import (
+    Balance_Entry, Balance_Snapshot, Checking_Account, Goal, Job, Monthly_Summary, Recurring_Transaction, Saving_Account, Transaction,
+)
+from .recurring import materialize
+from .search import search_goals, search_transactions
+from .rollups import monthly_totals
+from . import seed as seeding
+from .seed import seed
+from .views import TransactionImport
+from . import auth, exports, jobs
+from . import caching
+
+
+def make_goal(user, target='100.000', name='Goal', **fields):
+    return Goal.objects.create(
+        user=user, name=name, description='', target_amount=Decimal(target),
+        target_date=timezone.localdate() + timedelta(days=365), **fields,
+    )
+
+
+def make_transaction(user, amount='10.000', saving='4.000', transaction_type=Transaction.INCOME, name='Transaction', **fields):
+    amount, saving = Decimal(amount), Decimal(saving)
+    transaction = Transaction(
+        user=user, name=name, transaction_type=transaction_type,
+        amount=amount, saving_amount=saving, checking_amount=amount - saving, **fields,
+    )
+    transaction.save()
+    return transaction
+
+
+class CacheReset:
+    # The cache outlives each test's database while ids get reused: a user or list cached
+    # by an earlier test would otherwise stand in for this test's rows
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+# TransactionTestCase so on_commit cache invalidation runs like it does in production
+class QueryBudgetTests(CacheReset, TransactionTestCase):
+    databases = '__all__'  # GET requests read from the replica when one is configured
+
+    def test_hot_paths_stay_within_query_budgets(self):
+        seed(users=2, goals_per_user=3, transactions=500)
+        results = run_benchmarks(User.objects.get(username='seed_0000'), repeat=1)
+        self.assertEqual(set(results), set(QUERY_BUDGETS))
+        self.assertEqual(over_budget(results), [], results)
+
+
+def balance(model, user):
+    account = model.objects.filter(user=user).first()
+    return account.balance if account else Decimal('0.000')
+
+
+def journal_total(account_type, model, user):
+    account = model.objects.filter(user=user).first()
+    if account is None:
+        return Decimal('0.000')
+    entries = Balance_Entry.objects.filter(account_type=account_type, account_pk=account.pk)
+    return sum((entry.delta for entry in entries), Decimal('0.000'))
+
+
+class BalanceAssertions:
+    def assertBalances(self, user, saving, checking, goals=()):
+        # Stored balances are the expected ones, agree with the journal and with what the transactions add up to
+        self.assertEqual(balance(Saving_Account, user), Decimal(saving))
+        self.assertEqual(balance(Checking_Account, user), Decimal(checking))
+        self.assertEqual(journal_total(Balance_Entry.SAVING, Saving_Account, user), Decimal(saving))
+        self.assertEqual(journal_total(Balance_Entry.CHECKING, Checking_Account, user), Decimal(checking))
+        for goal, amount in goals:
+            goal.refresh_from_db()
+            self.assertEqual(goal.amount_saved, Decimal(amount))
+        expected_saving, expected_checking, expected_goals = expected_balances()
+        self.assertEqual(expected_saving.get(user.id, Decimal('0.000')), Decimal(saving))
+        self.assertEqual(expected_checking.get(user.id, Decimal('0.000')), Decimal(checking))
+        for goal, amount in goals:
+            self.assertEqual(expected_goals.get(goal.id, Decimal('0.000')), Decimal(amount))
+
+
+class SeedTests(CacheReset, TestCase):
+    def test_only_the_seeded_users_are_booked(self):
+        alice = User.objects.create(username='alice')
+        make_transaction(alice, transaction_date=date(2024, 1, 31))
+        # Drifted on purpose: seeding must leave other users' balances and rollups alone
+        Checking_Account.objects.filter(user=alice).update(balance=Decimal('99.000'))
+        Monthly_Summary.objects.filter(user=alice).update(transaction_count=7)
+
+        with mock.patch.object(seeding, 'BOOK_USERS', 2):  # Several booking batches
+            user_ids = seed(users=3, goals_per_user=2, transactions=300, batch_size=100)
+
+        self.assertEqual(balance(Checking_Account, alice), Decimal('99.000'))
+        self.assertEqual(Monthly_Summary.objects.get(user=alice).transaction_count, 7)
+        saving, checking, goals = expected_balances()
+        for user in User.objects.filter(pk__in=user_ids):
+            self.assertEqual(balance(Saving_Account, user), saving.get(user.id, Decimal('0.000')))
+            self.assertEqual(balance(Checking_Account, user), checking[user.id])
+            self.assertEqual(journal_total(Balance_Entry.SAVING, Saving_Account, user), saving.get(user.id, Decimal('0.000')))
+            self.assertEqual(journal_total(Balance_Entry.CHECKING, Checking_Account, user), checking[user.id])
+        for goal in Goal.objects.filter(user_id__in=user_ids):
+            self.assertEqual(goal.amount_saved, goals.get(goal.id, Decimal('0.000')))
+        rollups = {(row['user_id'], row['month'], row['transaction_count'], row['income'])
+                   for row in monthly_totals(Transaction.objects.filter(user_id__in=user_ids))}
+        stored = set(Monthly_Summary.objects.filter(user_id__in=user_ids).values_list('user_id', 'month', 'transaction_count', 'income'))
+        self.assertEqual(stored, rollups)
+
+
+class BalanceTests(CacheReset, BalanceAssertions, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        self.goal, self.other_goal = make_goal(self.user), make_goal(self.user)
+        # Loaded like a view would, so saves go through the tracked-changes path
+        self.transaction = Transaction.objects.get(pk=make_transaction(self.user, saving_goal=self.goal).pk)
+
+    def test_create(self):
+        self.assertBalances(self.user, saving='0.000', checking='6.000', goals=[(self.goal, '4.000')])
+        make_transaction(self.user, amount='5.000', saving='2.000')
+        self.assertBalances(self.user, saving='2.000', checking='9.000', goals=[(self.goal, '4.000')])
+
+    def test_amount_change(self):
+        self.transaction.amount, self.transaction.saving_amount, self.transaction.checking_amount = (
+            Decimal('15.000'), Decimal('5.000'), Decimal('10.000'))
+        self.transaction.save()
+        self.assertBalances(self.user, saving='0.000', checking='10.000', goals=[(self.goal, '5.000')])
+
+    def test_type_flip(self):
+        self.transaction.transaction_type = Transaction.EXPENDITURE
+        self.transaction.save()
+        self.assertBalances(self.user, saving='0.000', checking='-6.000', goals=[(self.goal, '-4.000')])
+        self.transaction.transaction_type = Transaction.INCOME
+        self.transaction.save()
+        self.assertBalances(self.user, saving='0.000', checking='6.000', goals=[(self.goal, '4.000')])
+
+    def test_move_to_another_goal(self):
+        self.transaction.saving_goal = self.other_goal
+        self.transaction.save()
+        self.assertBalances(self.user, saving='0.000', checking='6.000',
+                            goals=[(self.goal, '0.000'), (self.other_goal, '4.000')])
+
+    def test_unlink_goal(self):
+        self.transaction.saving_goal = None
+        self.transaction.save()
+        self.assertBalances(self.user, saving='4.000', checking='6.000', goals=[(self.goal, '0.000')])
+
+    def test_unsaved_instance_update(self):
+        # Not loaded from the database: the old row is read before the save
+        transaction = Transaction(
+            pk=self.transaction.pk, user=self.user, name='Transaction', transaction_type=Transaction.EXPENDITURE,
+            amount=Decimal('10.000'), saving_amount=Decimal('4.000'), checking_amount=Decimal('6.000'),
+            transaction_date=self.transaction.transaction_date,
+        )
+        transaction.save()
+        self.assertBalances(self.user, saving='-4.000', checking='-6.000', goals=[(self.goal, '0.000')])
+
+    def test_delete_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('transaction-delete', args=[self.transaction.pk]))
+        self.assertRedirects(response, '/transactions/', fetch_redirect_response=False)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertBalances(self.user, saving='0.000', checking='0.000', goals=[(self.goal, '0.000')])
+
+    def test_admin_delete(self):
+        admin = User.objects.create_superuser('admin', password='admin')
+        self.client.force_login(admin)
+        unlinked = make_transaction(self.user, amount='5.000', saving='2.000')
+        self.client.post(reverse('admin:main_app_transaction_delete', args=[self.transaction.pk]), {'post': 'yes'})
+        self.assertFalse(Transaction.objects.filter(pk=self.transaction.pk).exists())
+        self.assertBalances(self.user, saving='2.000', checking='3.000', goals=[(self.goal, '0.000')])
+        # "Delete selected", which goes through delete_transactions()
+        self.client.post(reverse('admin:main_app_transaction_changelist'), {
+            'action': 'delete_selected', '_selected_action': [unlinked.pk], 'post': 'yes',
+        })
+        self.assertFalse(Transaction.objects.exists())
+        self.assertBalances(self.user, saving='0.000', checking='0.000')
+
+
+class SnapshotTests(CacheReset, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        make_transaction(self.user, transaction_date=date(2024, 1, 10))
+        make_transaction(self.user, amount='20.000', saving='5.000', transaction_date=date(2024, 2, 10))
+        self.account_pk = Checking_Account.objects.get(user=self.user).pk
+
+    def balance_on(self, day):
+        return balance_on(Balance_Entry.CHECKING, self.account_pk, day)
+
+    def journal_balance_on(self, day):
+        # What balance_on() must agree with: every journal entry up to the day, no snapshots
+        entries = Balance_Entry.objects.filter(account_type=Balance_Entry.CHECKING, account_pk=self.account_pk, entry_date__lte=day)
+        return sum((entry.delta for entry in entries), Decimal('0.000'))
+
+    def test_back_dated_entry_after_a_snapshot(self):
+        days = [date(2024, 1, 9), date(2024, 1, 31), date(2024, 2, 15), date(2024, 2, 29), timezone.localdate()]
+        call_command('snapshot_balances', stdout=StringIO())
+        self.assertEqual(self.balance_on(date(2024, 1, 31)), Decimal('6.000'))
+
+        # Dated inside the snapshotted January but recorded after it (id > last_entry_id)
+        make_transaction(self.user, amount='7.000', saving='0.000', transaction_date=date(2024, 1, 20))
+        for day in days:
+            self.assertEqual(self.balance_on(day), self.journal_balance_on(day), day)
+        self.assertEqual(self.balance_on(date(2024, 1, 31)), Decimal('13.000'))
+
+        # A second run covers the new entry; nothing is counted twice
+        call_command('snapshot_balances', as_of=date(2024, 1, 31), stdout=StringIO())
+        latest = Balance_Snapshot.objects.filter(account_type=Balance_Entry.CHECKING, account_pk=self.account_pk,
+                                                 as_of=date(2024, 1, 31)).latest('last_entry_id')
+        self.assertEqual(latest.balance, Decimal('13.000'))
+        for day in days:
+            self.assertEqual(self.balance_on(day), self.journal_balance_on(day), day)
+        self.assertEqual(self.balance_on(timezone.localdate()), Decimal('28.000'))
+
+
+class BulkTests(CacheReset, BalanceAssertions, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        self.goal, self.other_goal = make_goal(self.user), make_goal(self.user)
+        self.day = date(2024, 1, 31)
+        self.linked = make_transaction(self.user, saving_goal=self.goal, transaction_date=self.day)
+        self.unlinked = make_transaction(self.user, amount='5.000', saving='2.000', transaction_date=self.day)
+        self.expenditure = make_transaction(self.user, amount='3.000', saving='0.000', transaction_date=self.day,
+                                            transaction_type=Transaction.EXPENDITURE)
+        self.assertBalances(self.user, saving='2.000', checking='6.000', goals=[(self.goal, '4.000')])
+
+    def test_type_change(self):
+        updated = update_transactions(Transaction.objects.filter(user=self.user), transaction_type=Transaction.EXPENDITURE)
+        self.assertEqual(updated, 3)
+        self.assertBalances(self.user, saving='-2.000', checking='-12.000', goals=[(self.goal, '-4.000')])
+
+    def test_goal_change(self):
+        update_transactions(Transaction.objects.filter(pk__in=[self.linked.pk, self.unlinked.pk]), saving_goal_id=self.other_goal.pk)
+        self.assertBalances(self.user, saving='0.000', checking='6.000',
+                            goals=[(self.goal, '0.000'), (self.other_goal, '6.000')])
+        update_transactions(Transaction.objects.filter(pk=self.linked.pk), saving_goal_id=None)
+        self.assertBalances(self.user, saving='4.000', checking='6.000',
+                            goals=[(self.goal, '0.000'), (self.other_goal, '2.000')])
+
+    def test_date_change(self):
+        # Balances stay, the journal and the monthly rollup move to the new month
+        new_day = date(2024, 2, 1)
+        update_transactions(Transaction.objects.filter(user=self.user), transaction_date=new_day)
+        self.assertBalances(self.user, saving='2.000', checking='6.000', goals=[(self.goal, '4.000')])
+        checking = Checking_Account.objects.get(user=self.user)
+        entries = Balance_Entry.objects.filter(account_type=Balance_Entry.CHECKING, account_pk=checking.pk)
+        self.assertEqual(sum(entry.delta for entry in entries.filter(entry_date=self.day)), Decimal('0.000'))
+        self.assertEqual(sum(entry.delta for entry in entries.filter(entry_date=new_day)), Decimal('6.000'))
+        months = {summary.month: summary.transaction_count for summary in Monthly_Summary.objects.filter(user=self.user)}
+        self.assertEqual(months, {date(2024, 1, 1): 0, date(2024, 2, 1): 3})
+
+    def test_delete(self):
+        deleted, _ = delete_transactions(Transaction.objects.filter(pk__in=[self.linked.pk, self.expenditure.pk]))
+        self.assertEqual(deleted, 2)
+        self.assertBalances(self.user, saving='2.000', checking='3.000', goals=[(self.goal, '0.000')])
+
+    def test_view_ignores_other_users_transactions(self):
+        bob = User.objects.create(username='bob')
+        bobs = make_transaction(bob)
+        self.client.force_login(self.user)
+        self.client.post(reverse('transaction-bulk'), {'action': 'delete', 'ids': [self.unlinked.pk, bobs.pk]})
+        self.assertTrue(Transaction.objects.filter(pk=bobs.pk).exists())
+        self.assertFalse(Transaction.objects.filter(pk=self.unlinked.pk).exists())
+        self.assertBalances(bob, saving='4.000', checking='6.000')
+        self.assertBalances(self.user, saving='0.000', checking='3.000', goals=[(self.goal, '4.000')])
+
+    def test_view_rejects_another_users_goal(self):
+        bobs_goal = make_goal(User.objects.create(username='bob'))
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('transaction-bulk'), {
+            'action': 'set_goal', 'saving_goal': bobs_goal.pk, 'ids': [self.linked.pk, self.unlinked.pk],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertBalances(self.user, saving='2.000', checking='6.000', goals=[(self.goal, '4.000'), (bobs_goal, '0.000')])
+
+    def test_view_rejects_malformed_ids_and_goals(self):
+        self.client.force_login(self.user)
+        for data in (
+            {'action': 'delete', 'ids': [self.linked.pk, '²']},
+            {'action': 'set_goal', 'saving_goal': '²', 'ids': [self.linked.pk]},
+            {'action': 'archive', 'ids': [self.linked.pk]},
+        ):
+            self.assertEqual(self.client.post(reverse('transaction-bulk'), data).status_code, 400, data)
+        self.assertBalances(self.user, saving='2.000', checking='6.000', goals=[(self.goal, '4.000')])
+
+
+class PaginationTests(CacheReset, TestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create(username='alice')
+        # Three rows share a date, so pages have to break the tie on the id
+        days = [date(2024, 3, 2), date(2024, 3, 1), date(2024, 3, 1), date(2024, 3, 1), date(2024, 2, 28)]
+        for day in days:
+            make_transaction(user, transaction_date=day)
+        self.transactions = Transaction.objects.filter(user=user)
+        self.newest_first = list(self.transactions.order_by('-transaction_date', '-id'))
+
+    def test_forward_and_back(self):
+        pages, cursor = [], None
+        while True:
+            rows, cursor, prev_cursor = keyset_page(self.transactions, after=cursor, per_page=2)
+            pages.append((rows, prev_cursor))
+            if cursor is None:
+                break
+        self.assertEqual([row for rows, _ in pages for row in rows], self.newest_first)
+        self.assertEqual([len(rows) for rows, _ in pages], [2, 2, 1])
+        self.assertIsNone(pages[0][1])
+
+        # Back from the last page, through the pages that split the shared date
+        cursor, back = pages[-1][1], []
+        while cursor:
+            rows, next_cursor, cursor = keyset_page(self.transactions, before=cursor, per_page=2)
+            self.assertIsNotNone(next_cursor)
+            back.append(rows)
+        self.assertEqual(back, [pages[1][0], pages[0][0]])
+
+    def test_invalid_cursor_gives_the_first_page(self):
+        first_page = self.newest_first[:2]
+        for cursor in ('garbage', '!!!', encode_cursor(date(2024, 3, 1), 1)[:-3], 'MjAyNC0wMy0wMXx4'):  # The last is '2024-03-01|x'
+            for direction in ('after', 'before'):
+                rows, next_cursor, prev_cursor = keyset_page(self.transactions, per_page=2, **{direction: cursor})
+                self.assertEqual(rows, first_page, (cursor, direction))
+                self.assertIsNone(prev_cursor)
+
+
+class RecurringTests(CacheReset, BalanceAssertions, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+
+    def make_rule(self, start, **fields):
+        return Recurring_Transaction.objects.create(
+            user=self.user, name='Rent', transaction_type=Transaction.EXPENDITURE, amount=Decimal('10.000'),
+            saving_amount=Decimal('0.000'), checking_amount=Decimal('10.000'), start_date=start, **fields,
+        )
+
+    def booked(self):
+        return list(Transaction.objects.filter(user=self.user).order_by('transaction_date').values_list('transaction_date', flat=True))
+
+    def test_month_end_is_clamped(self):
+        rule = self.make_rule(date(2024, 1, 31))
+        self.assertEqual(materialize(until=date(2024, 4, 30)), (1, 4))
+        self.assertEqual(self.booked(), [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)])
+        rule.refresh_from_db()
+        self.assertEqual(rule.next_date, date(2024, 5, 31))
+        self.assertBalances(self.user, saving='0.000', checking='-40.000')
+
+    def test_runs_again_without_booking_twice(self):
+        self.make_rule(date(2024, 1, 1))
+        materialize(until=date(2024, 3, 15))
+        self.assertEqual(materialize(until=date(2024, 3, 15)), (0, 0))
+        self.assertEqual(materialize(until=date(2024, 4, 1)), (1, 1))
+        self.assertEqual(len(self.booked()), 4)
+        self.assertBalances(self.user, saving='0.000', checking='-40.000')
+
+    def test_end_date(self):
+        self.make_rule(date(2024, 1, 1), interval=Recurring_Transaction.WEEKLY, end_date=date(2024, 1, 20))
+        materialize(until=date(2024, 3, 1))
+        self.assertEqual(self.booked(), [date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15)])
+        self.assertEqual(materialize(until=date(2024, 6, 1)), (0, 0))
+
+    def test_schedule_change_carries_on(self):
+        self.make_rule(date(2024, 1, 1))
+        materialize(until=date(2024, 3, 15))  # Jan 1, Feb 1, Mar 1
+        rule = Recurring_Transaction.objects.get(user=self.user)
+        rule.start_date = date(2024, 1, 15)
+        rule.save()
+        # Mid-month from now on: the 15ths before the last booking are not caught up
+        self.assertEqual(rule.next_date, date(2024, 4, 15))
+        materialize(until=date(2024, 4, 20))
+        self.assertEqual(self.booked(), [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 15)])
+
+        rule = Recurring_Transaction.objects.get(user=self.user)
+        rule.interval = Recurring_Transaction.WEEKLY
+        rule.save()
+        # Weekly on Mondays (like Jan 15), from where the monthly schedule stopped (May 15)
+        self.assertEqual(rule.next_date, date(2024, 5, 20))
+
+
+class TrackChangesTests(CacheReset, BalanceAssertions, TestCase):
+    def test_save_after_refresh_from_db(self):
+        user = User.objects.create(username='alice')
+        make_transaction(user)
+        transaction = Transaction.objects.get(user=user)
+        update_transactions(Transaction.objects.filter(pk=transaction.pk), transaction_type=Transaction.EXPENDITURE)
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.changed_fields, [])
+        transaction.name = 'Renamed'
+        transaction.save()
+        self.assertBalances(user, saving='-4.000', checking='-6.000')
+
+    def test_refreshing_some_fields_keeps_other_changes(self):
+        user = User.objects.create(username='alice')
+        transaction = make_transaction(user)
+        transaction.amount, transaction.checking_amount = Decimal('12.000'), Decimal('8.000')
+        transaction.refresh_from_db(fields=['name'])
+        self.assertEqual(transaction.changed_fields, ['amount', 'checking_amount'])
+
+
+class ReconcileTests(CacheReset, BalanceAssertions, TestCase):
+    def test_goal_shared_by_two_users(self):
+        alice, bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        goal = make_goal(alice)
+        make_transaction(alice, saving_goal=goal)
+        make_transaction(bob, amount='5.000', saving='3.000', saving_goal=goal)
+        self.assertBalances(alice, saving='0.000', checking='6.000', goals=[(goal, '7.000')])
+
+        out = StringIO()
+        call_command('reconcile_balances', stdout=out)
+        self.assertIn("All balances match", out.getvalue())
+
+
+class TransactionFormTests(CacheReset, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        self.client.force_login(self.alice)
+
+    def form_data(self, **fields):
+        return {
+            'name': 'Rent', 'transaction_type': Transaction.EXPENDITURE, 'description': '', 'saving_goal': '',
+            'amount': '10.000', 'saving_amount': '4.000', 'checking_amount': '6.000',
+            'transaction_date': timezone.localdate().isoformat(), **fields,
+        }
+
+    def test_create_rejects_another_users_goal(self):
+        response = self.client.post(reverse('transaction-create'), self.form_data(saving_goal=make_goal(self.bob).pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('saving_goal', response.context['form'].errors)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_update_only_own_transactions(self):
+        transaction = make_transaction(self.bob)
+        response = self.client.post(reverse('transaction-update', args=[transaction.pk]), self.form_data())
+        self.assertEqual(response.status_code, 404)
+
+
+class FilterFormTests(CacheReset, TestCase):
+    def test_goal_filter(self):
+        user = User.objects.create(username='alice')
+        goal = make_goal(user)
+        linked, unlinked = make_transaction(user, saving_goal=goal), make_transaction(user)
+        transactions = Transaction.objects.filter(user=user)
+        for value, expected in ((str(goal.pk), [linked]), (NO_GOAL, [unlinked]), ('', [linked, unlinked])):
+            self.assertCountEqual(TransactionFilterForm({'saving_goal': value}).filter(transactions), expected, value)
+        # Not ids: the filter is dropped, as for any field that doesn't validate
+        for value in ('²', '-1', '0', '1.5'):
+            form = TransactionFilterForm({'saving_goal': value})
+            self.assertCountEqual(form.filter(transactions), [linked, unlinked], value)
+            self.assertIn('saving_goal', form.errors)
+
+
+class CachingTests(CacheReset, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        self.goal = make_goal(self.alice)
+
+    def goal_names(self, user):
+        return [goal.name for goal in caching.cached_list(caching.GOALS, user.id, 'goals', lambda: Goal.objects.filter(user=user))]
+
+    def test_hits_and_misses(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.goal_names(self.alice), ['Goal'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.goal_names(self.alice), ['Goal'])
+        self.assertEqual(self.goal_names(self.bob), [])  # Per user
+        self.assertEqual(caching.cache_stats(), {'hits': 1, 'misses': 2})
+
+    def test_invalidated_on_commit(self):
+        self.goal_names(self.alice)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.goal.name = 'Renamed'
+            self.goal.save()
+            # Not committed yet: the cached list still stands
+            self.assertEqual(self.goal_names(self.alice), ['Goal'])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.goal_names(self.alice), ['Renamed'])
+        self.assertEqual(caching.cache_stats(), {'hits': 1, 'misses': 2})
+
+    def test_rolled_back_write_keeps_the_cache(self):
+        self.goal_names(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), db_transaction.atomic():
+                make_transaction(self.alice, saving_goal=self.goal)
+                raise RuntimeError
+        self.goal_names(self.alice)
+        self.assertEqual(caching.cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_other_users_writes_keep_the_cache(self):
+        self.goal_names(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_goal(self.bob)
+        self.goal_names(self.alice)
+        self.assertEqual(caching.cache_stats(), {'hits': 1, 'misses': 1})
+
+
+class ServerTimingTests(CacheReset, TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        make_transaction(self.user, saving_goal=make_goal(self.user))
+
+    def timings(self, response):
+        # {'db': (ms, description), 'tpl': (ms, None), ...}
+        timings = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, duration, *description = metric.split(';')
+            timings[name] = (float(duration.split('=')[1]), description[0].split('"')[1] if description else None)
+        return timings
+
+    def queries_reported(self, concurrent):
+        with override_settings(SERVER_TIMING=True, CONCURRENT_QUERIES=concurrent):
+            client = Client()
+            client.force_login(self.user)
+            caching._bump_version(caching.TRANSACTIONS, self.user.id)
+            response = client.get(reverse('transaction-index'))
+        return int(self.timings(response)['db'][1].split()[0])
+
+    def test_queries_on_worker_threads_are_counted(self):
+        # Async views run their queries on other threads (aio.concurrently)
+        self.assertGreater(self.queries_reported(concurrent=False), 0)
+        self.assertEqual(self.queries_reported(concurrent=True), self.queries_reported(concurrent=False))
+
+    def test_templates_are_timed(self):
+        with override_settings(SERVER_TIMING=True):
+            client = Client()
+            client.force_login(self.user)
+            timings = self.timings(client.get(reverse('goal-index')))
+            self.assertGreater(timings['tpl'][0], 0)
+            self.assertLessEqual(timings['tpl'][0], timings['total'][0])
+            # Nothing is timed outside a request
+            self.assertIsNone(current_metrics.get())
+            self.assertTrue(render_to_string('goals/index.html', {'goals': []}))
+
+    async def test_async_requests(self):
+        with override_settings(SERVER_TIMING=True, CONCURRENT_QUERIES=False):
+            self.assertTrue(iscoroutinefunction(ServerTimingMiddleware(AsyncClient().handler.get_response_async)))
+            client = AsyncClient()
+            await client.aforce_login(self.user)
+            caching._bump_version(caching.TRANSACTIONS, self.user.id)
+            response = await client.get(reverse('transaction-index'))
+        self.assertEqual(response.status_code, 200)
+        queries = int(self.timings(response)['db'][1].split()[0])
+        self.assertEqual(queries, await sync_to_async(self.queries_reported)(concurrent=False))
+
+
+# Classes that make requests are TransactionTestCases: with a replica, async views read
+# it on other threads and connections, which don't see a TestCase's open transaction
+class AuthTests(CacheReset, TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='correct horse')
+
+    def test_password_checked_once(self):
+        with mock.patch.object(User, 'check_password', autospec=True, return_value=False) as check_password:
+            self.assertIsNone(authenticate(username='alice', password='wrong'))
+        self.assertEqual(check_password.call_count, 1)
+        self.assertEqual(authenticate(username='alice', password='correct horse'), self.user)
+
+    def test_cached_user_dropped_on_save(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('goal-index'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('goal-index'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_password_hash_not_cached(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('goal-index'))
+        entry = cache.get(auth._user_key(self.user.pk))
+        self.assertNotIn('password', entry['fields'])
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(entry))
+        # Served without a query, with the password loaded only when something reads it
+        backend = auth.CachedModelBackend()
+        with self.assertNumQueries(0):
+            cached = backend.get_user(self.user.pk)
+            self.assertEqual((cached, cached.username), (self.user, 'alice'))
+            self.assertEqual(cached.get_session_auth_hash(), self.user.get_session_auth_hash())
+        self.assertIn('password', cached.get_deferred_fields())
+        # A full save() of the cached user leaves the password alone
+        cached.first_name = 'Alice'
+        cached.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('correct horse'))
+
+    def test_password_change(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('goal-index'))
+        cached = auth.CachedModelBackend().get_user(self.user.pk)
+        cached.set_password('battery staple')
+        cached.save()
+        # The session hash follows the new password (update_session_auth_hash() relies on it)...
+        self.assertEqual(cached.get_session_auth_hash(), User.objects.get(pk=self.user.pk).get_session_auth_hash())
+        # ...and sessions made with the old one are logged out
+        self.assertEqual(self.client.get(reverse('goal-index')).status_code, 302)
+
+
+class ImportTests(CacheReset, BalanceAssertions, TestCase):
+    def test_invalid_amounts_skip_the_row(self):
+        user = User.objects.create(username='alice')
+        rows = parse_csv(StringIO(
+            'name,amount,saving_amount,transaction_date\n'
+            'Salary,10.000,4.000,2024-01-31\n'
+            'Broken,NaN,0,2024-01-31\n'
+            'Broken,10,sNaN,2024-01-31\n'
+            'Broken,Infinity,0,2024-01-31\n'
+            'Broken,1e20,0,2024-01-31\n'
+        ))
+        result = import_transactions(rows, user)
+        self.assertEqual((result.created, result.skipped), (1, 4))
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5, 6])
+        self.assertBalances(user, saving='4.000', checking='6.000')
+
+    def test_background_import_result_is_shown(self):
+        user = User.objects.create(username='alice')
+        self.client.force_login(user)
+        # The upload is written to a temporary directory, not the real import_uploads
+        upload_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, upload_root, ignore_errors=True)
+        storage = mock.patch.object(upload_storage, 'location', upload_root)
+        storage.start()
+        self.addCleanup(storage.stop)
+
+        upload = SimpleUploadedFile('history.csv', b'name,amount,transaction_date\nSalary,10,2024-01-31\nBroken,x,2024-01-31\n')
+        with mock.patch.object(TransactionImport, 'BACKGROUND_SIZE', 10):
+            response = self.client.post(reverse('transaction-import'), {'file': upload})
+        self.assertContains(response, 'importing...')
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(os.listdir(upload_root), [str(user.id)])
+
+        jobs.run(jobs.claim_next('test'))
+        response = self.client.get(reverse('transaction-import'))
+        self.assertContains(response, '<strong>1</strong> transaction imported, <strong>1</strong> skipped.', html=False)
+        self.assertContains(response, "Line 3: &#x27;x&#x27; is not a valid amount")
+        self.assertEqual(Transaction.objects.get().name, 'Salary')
+
+
+class ExportTests(CacheReset, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        for day in range(1, 31):
+            make_transaction(self.user, name=f'Salary {day}', transaction_date=date(2024, 1, day))
+        make_transaction(User.objects.create(username='bob'), name='Not exported')
+        self.client.force_login(self.user)
+
+    def export(self, **headers):
+        response = self.client.get(reverse('transaction-export'), {'format': 'ndjson'}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        return response, b''.join(response.streaming_content)
+
+    def test_plain_without_accept_encoding(self):
+        for headers in ({}, {'Accept-Encoding': 'identity'}, {'Accept-Encoding': 'br, deflate'}):
+            response, body = self.export(**headers)
+            self.assertFalse(response.has_header('Content-Encoding'), headers)
+            records = [json.loads(line) for line in body.decode().splitlines()]
+            self.assertEqual([record['name'] for record in records], [f'Salary {day}' for day in range(1, 31)])
+
+    def test_gzip_when_accepted(self):
+        _, plain = self.export()
+        # Small flushes, so the gzip stream spans several chunks
+        with mock.patch.object(exports, 'FLUSH_SIZE', 100):
+            response, body = self.export(**{'Accept-Encoding': 'gzip, deflate, br'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertLess(len(body), len(plain))
+
+
+class ForecastTests(CacheReset, TestCase):
+    def test_transaction_on_another_users_goal(self):
+        alice, bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        bobs_goal = make_goal(bob)
+        alices_goal = make_goal(alice)  # The higher id, past the end of Bob's goals
+        today = timezone.localdate()
+        for days_ago in (20, 10):
+            make_transaction(alice, saving_goal=alices_goal, transaction_date=today - timedelta(days=days_ago))
+        # Bob's transaction counts towards Alice's goal, and is not part of Bob's history
+        make_transaction(bob, saving_goal=alices_goal, transaction_date=today - timedelta(days=5))
+        make_transaction(bob, saving_goal=bobs_goal, transaction_date=today - timedelta(days=5))
+
+        self.assertEqual(forecast_goals([bob.id]), 0)  # One day of history: still unknown
+        self.assertEqual(forecast_goals([alice.id]), 1)
+        alices_goal.refresh_from_db()
+        self.assertIsNotNone(alices_goal.projected_date)
+        self.assertTrue(alices_goal.on_track)
+
+    def test_goal_owner_forecast_is_queued(self):
+        alice, bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        goal = make_goal(alice)
+        Job.objects.all().delete()
+        make_transaction(bob, saving_goal=goal)
+        self.assertEqual([job.payload for job in Job.objects.filter(task='forecast_goals')], [{'user_id': alice.id}])
+
+
+class JobTests(CacheReset, TestCase):
+    def claim_and_crash(self, **job_fields):
+        job = jobs.enqueue('rebuild_rollups', **job_fields)
+        self.assertEqual(jobs.claim_next('worker-1').pk, job.pk)
+        # The worker dies: the job stays "running" until it is stale
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.STALE_AFTER - timedelta(minutes=1))
+        return job
+
+    def test_stale_job_without_attempts_left_fails(self):
+        job = self.claim_and_crash(max_attempts=1)
+        self.assertEqual(jobs.requeue_stale(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+        self.assertIsNone(jobs.claim_next('worker-2'))
+
+    def test_stale_job_with_attempts_left_is_requeued(self):
+        job = self.claim_and_crash(max_attempts=2)
+        self.assertEqual(jobs.requeue_stale(), (1, 0))
+        claimed = jobs.claim_next('worker-2')
+        self.assertEqual((claimed.pk, claimed.attempts), (job.pk, 2))
+
+    def test_purge_finished(self):
+        old = timezone.now() - jobs.KEEP_FINISHED - timedelta(days=1)
+        for status in (Job.DONE, Job.FAILED, Job.PENDING):
+            Job.objects.create(task='rebuild_rollups', status=status)
+        Job.objects.update(updated_at=old)
+        recent = Job.objects.create(task='rebuild_rollups', status=Job.DONE)
+        self.assertEqual(jobs.purge_finished(), 2)
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.PENDING, Job.DONE})
+        self.assertTrue(Job.objects.filter(pk=recent.pk).exists())
+
+    def test_pending_job_without_attempts_left_is_not_claimed(self):
+        Job.objects.create(task='rebuild_rollups', attempts=1, max_attempts=1)
+        self.assertIsNone(jobs.claim_next('worker-1'))
+
+
+class AdjustmentTests(CacheReset, BalanceAssertions, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        self.client.force_login(self.user)
+
+    def goal_data(self, amount_saved):
+        return {
+            'name': 'Car', 'description': 'New car', 'target_amount': '1000.000', 'amount_saved': amount_saved,
+            'target_date': (timezone.localdate() + timedelta(days=30)).isoformat(), 'status': Goal.ONGOING,
+        }
+
+    def test_goal_amount_saved_is_booked(self):
+        self.client.post(reverse('goal-create'), self.goal_data('300.000'))
+        goal = Goal.objects.get(user=self.user)
+        self.assertBalances(self.user, saving='0.000', checking='0.000', goals=[(goal, '300.000')])
+
+        self.client.post(reverse('goal-update', args=[goal.pk]), self.goal_data('250.000'))
+        self.assertBalances(self.user, saving='0.000', checking='0.000', goals=[(goal, '250.000')])
+        self.assertEqual(
+            list(Transaction.objects.filter(saving_goal=goal).order_by('pk').values_list('transaction_type', 'saving_amount')),
+            [(Transaction.INCOME, Decimal('300.000')), (Transaction.EXPENDITURE, Decimal('50.000'))],
+        )
+        out = StringIO()
+        call_command('reconcile_balances', stdout=out)
+        self.assertIn("All balances match", out.getvalue())
+
+    def test_account_balance_is_booked(self):
+        make_transaction(self.user)
+        account = Checking_Account.objects.get(user=self.user)
+        self.client.post(reverse('checking-account-update', args=[account.pk]), {'balance': '100.000'})
+        self.assertBalances(self.user, saving='4.000', checking='100.000')
+
+
+class ProgressTests(CacheReset, TestCase):
+    def test_progress_is_clamped_before_the_cast(self):
+        user = User.objects.create(username='alice')
+        # 9 999 999 saved against 0.001 is ~10^12 percent, past any 32-bit integer
+        far_past = make_goal(user, target='0.001', amount_saved=Decimal('9999999.000'))
+        negative = make_goal(user, amount_saved=Decimal('-5.000'))
+        halfway = make_goal(user, amount_saved=Decimal('49.600'))
+        no_target = make_goal(user, target='0.000', amount_saved=Decimal('5.000'))
+        progress = dict(Goal.objects.with_progress().values_list('id', 'progress'))
+        self.assertEqual(progress, {far_past.id: 100, negative.id: 0, halfway.id: 50, no_target.id: 0})
+
+
+class ApiTests(CacheReset, BalanceAssertions, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        self.alices_goal, self.bobs_goal = make_goal(self.alice), make_goal(self.bob)
+        self.alices = make_transaction(self.alice, saving_goal=self.alices_goal)
+        self.bobs = make_transaction(self.bob, saving_goal=self.bobs_goal)
+        self.client.force_login(self.alice)
+
+    def send(self, method, name, data=None, pk=None):
+        url = reverse(name, args=[pk] if pk else [])
+        if method in ('get', 'delete'):
+            return getattr(self.client, method)(url)
+        return getattr(self.client, method)(url, json.dumps(data or {}), content_type='application/json')
+
+    def test_anonymous_is_refused(self):
+        self.client.logout()
+        response = self.client.get(reverse('api-transaction-list'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'error': 'Authentication required.'})
+
+    def test_lists_are_scoped_to_the_user(self):
+        transactions = self.client.get(reverse('api-transaction-list')).json()['results']
+        self.assertEqual([row['id'] for row in transactions], [self.alices.pk])
+        goals = self.client.get(reverse('api-goal-list')).json()['results']
+        self.assertEqual([row['id'] for row in goals], [self.alices_goal.pk])
+        accounts = self.client.get(reverse('api-account-list'), {'fields': 'balance'}).json()
+        self.assertEqual(accounts, {'saving_accounts': [], 'checking_accounts': [{'balance': '6'}]})
+
+    def test_other_users_rows_are_not_found(self):
+        for name, pk in (('api-transaction-detail', self.bobs.pk), ('api-goal-detail', self.bobs_goal.pk)):
+            for method in ('get', 'patch', 'delete'):
+                self.assertEqual(self.send(method, name, {'name': 'Mine'}, pk=pk).status_code, 404, (name, method))
+        self.assertEqual(Transaction.objects.get(pk=self.bobs.pk).name, 'Transaction')
+        self.assertEqual(Goal.objects.get(pk=self.bobs_goal.pk).name, 'Goal')
+        self.assertBalances(self.bob, saving='0.000', checking='6.000', goals=[(self.bobs_goal, '4.000')])
+
+    def test_transaction_writes_move_the_balances(self):
+        data = {'name': 'Salary', 'transaction_type': Transaction.INCOME, 'description': '', 'saving_goal': self.alices_goal.pk,
+                'amount': '20', 'saving_amount': '5', 'checking_amount': '15',
+                'transaction_date': timezone.localdate().isoformat()}
+        response = self.send('post', 'api-transaction-list', data)
+        self.assertEqual(response.status_code, 201)
+        created = response.json()
+        self.assertEqual((created['amount'], created['saving_goal']), ('20', self.alices_goal.pk))
+        self.assertBalances(self.alice, saving='0.000', checking='21.000', goals=[(self.alices_goal, '9.000')])
+
+        response = self.send('patch', 'api-transaction-detail', {'amount': '30', 'checking_amount': '25'}, pk=created['id'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Salary')  # Fields not sent are kept
+        self.assertBalances(self.alice, saving='0.000', checking='31.000', goals=[(self.alices_goal, '9.000')])
+
+        self.assertEqual(self.send('delete', 'api-transaction-detail', pk=created['id']).status_code, 204)
+        self.assertBalances(self.alice, saving='0.000', checking='6.000', goals=[(self.alices_goal, '4.000')])
+
+    def test_transaction_on_another_users_goal_is_refused(self):
+        response = self.send('patch', 'api-transaction-detail', {'saving_goal': self.bobs_goal.pk}, pk=self.alices.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('saving_goal', response.json()['errors'])
+        self.assertBalances(self.bob, saving='0.000', checking='6.000', goals=[(self.bobs_goal, '4.000')])
+        self.assertBalances(self.alice, saving='0.000', checking='6.000', goals=[(self.alices_goal, '4.000')])
+
+    def test_goal_writes(self):
+        data = {'name': 'Bike', 'description': 'Commuting', 'target_amount': '300', 'amount_saved': '0',
+                'target_date': (timezone.localdate() + timedelta(days=30)).isoformat(), 'status': Goal.NOT_STARTED}
+        response = self.send('post', 'api-goal-list', data)
+        self.assertEqual(response.status_code, 201, response.json())
+        goal = Goal.objects.get(pk=response.json()['id'])
+        self.assertEqual((goal.user, goal.name), (self.alice, 'Bike'))
+        self.assertEqual(goal.status, Goal.NOT_STARTED)
+        response = self.send('patch', 'api-goal-detail', {'name': 'Bicycle', 'amount_saved': '100'}, pk=goal.pk)
+        self.assertEqual(response.status_code, 200, response.json())
+        self.assertEqual((response.json()['name'], response.json()['amount_saved']), ('Bicycle', '100'))
+        self.assertBalances(self.alice, saving='0.000', checking='6.000', goals=[(goal, '100.000')])
+        self.assertEqual(self.send('delete', 'api-goal-detail', pk=goal.pk).status_code, 204)
+        self.assertFalse(Goal.objects.filter(pk=goal.pk).exists())
+
+
+@skipUnless(connection.vendor == 'sqlite', "Exercises the SQLite FTS5 index")
+class SearchTests(CacheReset, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+
+    def search(self, query, user=None):
+        return [transaction.pk for transaction in search_transactions(user or self.alice, query)]
+
+    def test_name_ranks_above_description(self):
+        # The name match is the older row, so the id tie-break alone would put it second
+        in_name = make_transaction(self.alice, name='Vacation deposit', description='Hotel')
+        in_description = make_transaction(self.alice, name='Booking', description='Summer vacation flight')
+        unrelated = make_transaction(self.alice, name='Groceries', description='Weekly shop')
+        self.assertEqual(self.search('vacation'), [in_name.pk, in_description.pk])
+        self.assertEqual(self.search('vaca'), [in_name.pk, in_description.pk])  # The last word is a prefix
+        self.assertEqual(self.search('vacation hotel'), [in_name.pk])  # Every word has to match
+        self.assertNotIn(unrelated.pk, self.search('shop groceries vacation'))
+
+    def test_scoped_to_the_user(self):
+        alices = make_transaction(self.alice, name='Rent')
+        bobs = make_transaction(self.bob, name='Rent')
+        self.assertEqual(self.search('rent'), [alices.pk])
+        self.assertEqual(self.search('rent', user=self.bob), [bobs.pk])
+        alices_goal, _ = make_goal(self.alice, name='Rent buffer'), make_goal(self.bob, name='Rent buffer')
+        self.assertEqual([goal.pk for goal in search_goals(self.alice, 'rent')], [alices_goal.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        transaction = make_transaction(self.alice, name='Rent')
+        Transaction.objects.filter(pk=transaction.pk).update(name='Mortgage')  # No save(): the triggers still run
+        self.assertEqual(self.search('rent'), [])
+        self.assertEqual(self.search('mortgage'), [transaction.pk])
+        transaction.delete()
+        self.assertEqual(self.search('mortgage'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        make_transaction(self.alice, name='Rent')
+        for query in ('"', 'rent OR', 'NEAR(rent', '*', 'name:rent', '-rent'):
+            self.assertIsInstance(self.search(query), list, query)
+        self.assertEqual(self.search('rent OR'), [])  # Both words have to match, OR is just a word
+
+
+class OwnershipTests(CacheReset, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        self.goal = make_goal(self.alice)
+        self.transaction = make_transaction(self.alice, saving_goal=self.goal)
+
+    def test_anonymous_delete_is_refused(self):
+        response = self.client.post(reverse('transaction-delete', args=[self.transaction.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('login', response['Location'])
+        self.assertTrue(Transaction.objects.filter(pk=self.transaction.pk).exists())
+
+    def test_other_users_rows_are_not_found(self):
+        self.client.force_login(self.bob)
+        for name, pk in (('transaction-delete', self.transaction.pk), ('goal-delete', self.goal.pk), ('goal-update', self.goal.pk)):
+            self.assertEqual(self.client.post(reverse(name, args=[pk])).status_code, 404, name)
+        self.assertTrue(Transaction.objects.filter(pk=self.transaction.pk).exists())
+        self.assertTrue(Goal.objects.filter(pk=self.goal.pk).exists())
@@ -2,6 +2,7 @@
 
 from django.urls import path
 from . import views # Import views to connect routes to view functions
+from . import api
 
 urlpatterns = [
    path('goals/', views.goal_index, name='goal-index'),
@@ -17,9 +18,24 @@ urlpatterns = [
     path('checking_accounts/<int:pk>/update/', views.CheckingAccountUpdate.as_view(), name='checking-account-update'),
    path('transactions/create/', views.TransactionCreate.as_view(), name='transaction-create'),
    path('transactions/', views.TransactionList.as_view(), name='transaction-index'),
+   path('transactions/import/', views.TransactionImport.as_view(), name='transaction-import'),
+   path('transactions/export/', views.TransactionExport.as_view(), name='transaction-export'),
+   path('transactions/bulk/', views.TransactionBulk.as_view(), name='transaction-bulk'),
    path('transactions/<int:pk>/', views.TransactionDetail.as_view(), name='transaction-detail'),
    path('transactions/<int:pk>/update/', views.TransactionUpdate.as_view(), name='transaction-update'),
    path('transactions/<int:pk>/delete/', views.TransactionDelete.as_view(), name='transaction-delete'),
+   path('recurring/', views.RecurringList.as_view(), name='recurring-index'),
+   path('recurring/create/', views.RecurringCreate.as_view(), name='recurring-create'),
+   path('recurring/<int:pk>/update/', views.RecurringUpdate.as_view(), name='recurring-update'),
+   path('recurring/<int:pk>/delete/', views.RecurringDelete.as_view(), name='recurring-delete'),
+   # JSON API
+   path('api/transactions/', api.TransactionListApi.as_view(), name='api-transaction-list'),
+   path('api/transactions/<int:pk>/', api.TransactionDetailApi.as_view(), name='api-transaction-detail'),
+   path('api/goals/', api.GoalListApi.as_view(), name='api-goal-list'),
+   path('api/goals/<int:pk>/', api.GoalDetailApi.as_view(), name='api-goal-detail'),
+   path('api/accounts/', api.AccountListApi.as_view(), name='api-account-list'),
+   path('search/', views.search, name='search'),
+   path('api/search/', api.SearchApi.as_view(), name='api-search'),
    path('', views.Home.as_view(), name='home'),
    path('accounts/signup/', views.signup, name='signup'),
 ]
\ No newline at end of file
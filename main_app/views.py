@@ -1,25 +1,37 @@
 # main_app/views.py
 
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.views.generic import ListView, DetailView # add these 
-from .models import Goal, Saving_Account, Checking_Account, Transaction
+from django.views.generic.base import TemplateResponseMixin
+from django.views.generic.edit import FormView
+from django.views import View
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.db import transaction
+from .models import Goal, Saving_Account, Checking_Account, Transaction, Recurring_Transaction, Monthly_Summary, Job, Balance_Entry
+from .pagination import keyset_page
+from .imports import CSV_COLUMNS, detect_format, import_transactions, read_upload, upload_storage
+from .exports import export_chunks
+from . import caching, jobs
+from .aio import auser, concurrently
+from .balances import ZERO, adjust, delete_transactions, update_transactions
+from .search import search_goals, search_transactions
+from .filters import NO_GOAL, TransactionFilterForm, facet_counts, facet_rows
+from .recurring import upcoming
 from django.contrib.auth.views import LoginView
 from django.contrib.auth import login
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django import forms
-from datetime import date
+from datetime import date, timedelta
+import os
 
 # Ensures the user cannot enter a date in the past
 class GoalForm(forms.ModelForm):
-    STATUS_CHOICES = [
-        ('not_started', 'Not Started'),
-        ('ongoing', 'Ongoing'),
-        ('completed', 'Completed')
-    ]
-
-    status = forms.ChoiceField(choices=STATUS_CHOICES, required=True)
+    status = forms.ChoiceField(choices=Goal.STATUS_CHOICES, required=True)
     class Meta:
         model = Goal
         fields = ['image', 'name', 'description', 'target_amount', 'amount_saved', 'target_date', 'status']
@@ -45,13 +57,49 @@ class GoalForm(forms.ModelForm):
         
         # Set the status based on amount_saved
         if amount_saved == 0:
-            return 'Not started'
+            return Goal.NOT_STARTED
         elif amount_saved < target_amount:
             return 'ongoing'
         elif amount_saved >= target_amount:
             return 'completed'
         return self.cleaned_data['status']
 
+    def save(self, commit=True):
+        # amount_saved is never written directly: the change is booked as an adjustment
+        # transaction (balances.adjust), so the journal and reconcile_balances agree with it
+        if not commit:
+            return super().save(commit)
+        amount_saved = self.instance.amount_saved
+        current = (getattr(self.instance, 'original', None) or {}).get('amount_saved', ZERO)
+        self.instance.amount_saved = current
+        with transaction.atomic():
+            goal = super().save(commit)
+            if adjust(goal.user, amount_saved - current, goal=goal):
+                goal.refresh_from_db(fields=['amount_saved', 'updated_at'])
+        return goal
+
+
+# Async read views: under ASGI a request waiting on the database doesn't hold a worker thread.
+# They answer with a TemplateResponse, which Django renders off the event loop.
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    # LoginRequiredMixin for async views (it reads request.user synchronously)
+    async def dispatch(self, request, *args, **kwargs):
+        user = await auser(request)
+        if not user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncDetailView(AsyncLoginRequiredMixin, DetailView):
+    # DetailView with the row fetched by the async ORM, limited to the user's own rows
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.object = await self.get_queryset().filter(user=request.user).aget(pk=kwargs['pk'])
+        except self.model.DoesNotExist:
+            raise Http404(f"No {self.model._meta.verbose_name} found matching the query")
+        return self.render_to_response(self.get_context_data(object=self.object))
+
 
 class GoalCreate(LoginRequiredMixin, CreateView):
     model = Goal
@@ -63,7 +111,15 @@ class GoalCreate(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class TransactionCreate(LoginRequiredMixin, CreateView):
+class UserGoalsMixin:
+    # Transactions can only be linked to the user's own goals
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        form.fields['saving_goal'].queryset = Goal.objects.filter(user=self.request.user)
+        return form
+
+
+class TransactionCreate(LoginRequiredMixin, UserGoalsMixin, CreateView):
     model = Transaction
     fields = ['name','transaction_type','description','saving_goal',
               'amount','saving_amount','checking_amount','transaction_date']
@@ -81,116 +137,209 @@ class TransactionCreate(LoginRequiredMixin, CreateView):
 class Home(LoginView):
     template_name = 'home.html'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.request.user.is_authenticated:
+            # Last 12 months straight from the rollup table, no SUM over all transactions
+            context['monthly_summaries'] = Monthly_Summary.objects.filter(user=self.request.user)[:12]
+        return context
+
 
 # Create a new view to list both Saving and Checking accounts
-def accounts_list(request):
-    # Fetch all saving and checking accounts
-    saving_accounts = Saving_Account.objects.all()
-    checking_accounts = Checking_Account.objects.all()
+@login_required
+async def accounts_list(request):
+    # Fetch the user's saving and checking accounts (cached until one of their accounts or transactions changes),
+    # both at the same time
+    user = await auser(request)
+    saving_accounts, checking_accounts = await concurrently(
+        lambda: caching.cached_list(caching.ACCOUNTS, user.id, 'saving_accounts', lambda: Saving_Account.objects.filter(user=user)),
+        lambda: caching.cached_list(caching.ACCOUNTS, user.id, 'checking_accounts', lambda: Checking_Account.objects.filter(user=user)),
+    )
 
     # Pass these objects to the template
-    return render(request, 'main_app/account_list.html', {
+    return TemplateResponse(request, 'main_app/account_list.html', {
         'saving_accounts': saving_accounts,
         'checking_accounts': checking_accounts
     })
 
 
-def goal_index(request):
-    # Fetch only the goals for the current logged-in user
-    goals = Goal.objects.filter(user=request.user)
-    for g in goals:
-        try:
-            g.progress = max(0, min(100, round((g.amount_saved / g.target_amount) * 100))) if g.target_amount else 0
-        except Exception:
-            g.progress = 0
-    return render(request, 'goals/index.html', {'goals': goals})
-
-def goal_detail(request, goal_id):
-    # Fetch the specific goal using the goal_id
-    goal = get_object_or_404(Goal, id=goal_id)
+@login_required
+async def goal_index(request):
+    # Fetch only the goals for the current logged-in user, progress is computed by the database
+    user = await auser(request)
+    goals, = await concurrently(lambda: caching.cached_list(
+        caching.GOALS, user.id, 'goal_index',
+        lambda: Goal.objects.filter(user=user).with_progress(),
+    ))
+    return TemplateResponse(request, 'goals/index.html', {'goals': goals})
+
+@login_required
+async def goal_detail(request, goal_id):
+    # Fetch the specific goal using the goal_id (only the user's own goals)
+    user = await auser(request)
     try:
-        goal.progress = max(0, min(100, round((goal.amount_saved / goal.target_amount) * 100))) if goal.target_amount else 0
-    except Exception:
-        goal.progress = 0
-    
-    return render(request, 'goals/detail.html', {'goal': goal})
+        goal = await Goal.objects.with_progress().aget(id=goal_id, user=user)
+    except Goal.DoesNotExist:
+        raise Http404("No goal found matching the query")
+    return TemplateResponse(request, 'goals/detail.html', {'goal': goal})
 
-class GoalUpdate(UpdateView):
+class GoalUpdate(LoginRequiredMixin, UpdateView):
     model = Goal
     form_class = GoalForm  # Use the custom form
     success_url = '/goals/'
 
-class GoalDelete(DeleteView):
-    model = Goal
-    success_url = '/goals/'
+    def get_queryset(self):
+        return Goal.objects.filter(user=self.request.user)
 
 # Goal update view with restriction for "Checking" and "Savings" accounts
-class SavingAccountUpdate(UpdateView):
-    model = Saving_Account
+class AccountUpdateMixin(LoginRequiredMixin):
+    # Setting a balance books the difference as an adjustment transaction instead of writing the column
     fields = ['balance']
+
+    def get_queryset(self):
+        return self.model.objects.filter(user=self.request.user)
+
+    def form_valid(self, form):
+        account = form.instance
+        adjust(self.request.user, account.balance - account.original['balance'], account_type=self.account_type)
+        return redirect(self.get_success_url())
+
+
+class SavingAccountUpdate(AccountUpdateMixin, UpdateView):
+    model = Saving_Account
+    account_type = Balance_Entry.SAVING
     success_url = '/saving_account/'
 
-class CheckingAccountUpdate(UpdateView):
+class CheckingAccountUpdate(AccountUpdateMixin, UpdateView):
     model = Checking_Account
-    fields = ['balance']
+    account_type = Balance_Entry.CHECKING
     success_url = '/checking_accounts/'  # Redirect after successful update
 
-class GoalDelete(DeleteView):
+class GoalDelete(LoginRequiredMixin, DeleteView):
     model = Goal
     success_url = '/goals/'
 
+    def get_queryset(self):
+        return Goal.objects.filter(user=self.request.user)
 
+
+@login_required
 def saving_account_list(request):
-    # Fetch all accounts from the database
-    saving_accounts = Saving_Account.objects.all()
+    # Fetch the user's account from the database
+    saving_accounts = caching.cached_list(caching.ACCOUNTS, request.user.id, 'saving_accounts', lambda: Saving_Account.objects.filter(user=request.user))
     return render(request, 'main_app/account_list.html', {'saving_accounts':saving_accounts})
 
-class SavingAccountDetail(DetailView):
+class SavingAccountDetail(AsyncDetailView):
     model = Saving_Account
 
 
+@login_required
 def checking_account_list(request):
-    # Fetch all accounts from the database
-    checking_accounts = Checking_Account.objects.all()
+    # Fetch the user's account from the database
+    checking_accounts = caching.cached_list(caching.ACCOUNTS, request.user.id, 'checking_accounts', lambda: Checking_Account.objects.filter(user=request.user))
     return render(request, 'main_app/account_list.html', {'checking_accounts':checking_accounts})
 
-class CheckingAccountDetail(DetailView):
+class CheckingAccountDetail(AsyncDetailView):
     model = Checking_Account
 
-class TransactionCreate(CreateView):
-    model = Transaction
-    fields = ['name', 'transaction_type', 'description', 'saving_goal', 
-              'amount', 'saving_amount', 'checking_amount', 'transaction_date']
-    success_url = '/transactions/'  # Redirect to the transaction list after successful creation
-
-    def form_valid(self, form):
-            try:
-                form.save()  # This will call the model's save() method
-            except ValueError as e:
-                form.add_error('saving_amount', str(e))  # Add error to saving_amount field
-                form.add_error('checking_amount', str(e))  # Add error to checking_amount field
-                return self.form_invalid(form)  # Redisplay the form with errors
-            return super().form_valid(form)
-            
-    
 # Add other views like TransactionList, TransactionDetail, etc.
 
-class TransactionList(ListView):
-    model = Transaction
+class TransactionList(AsyncLoginRequiredMixin, TemplateResponseMixin, View):
     template_name = 'main_app/transaction_list.html'
-    context_object_name = 'transactions'   
-
-class TransactionDetail(DetailView):
+    paginate_by = 20
+
+    async def get(self, request):
+        # Only the current user's rows, narrowed by the ?date_from=&transaction_type=... filters
+        self.filter_form = TransactionFilterForm(request.GET)
+        self.filtered = self.filter_form.filter(Transaction.objects.filter(user=request.user))
+
+        # The page, the goals (for the goal filter and the bulk "set goal" action) and the
+        # facet counts don't depend on each other: fetch them at the same time
+        (transactions, next_cursor, prev_cursor), goals, facet_rows = await concurrently(
+            self.page,
+            lambda: list(Goal.objects.filter(user=request.user).only('id', 'name')),
+            self.cached_facet_rows,
+        )
+        return self.render_to_response({
+            'transactions': transactions,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'is_paginated': bool(next_cursor or prev_cursor),
+            'goals': goals,
+            'filter_form': self.filter_form,
+            'filter_query': self.query_with(),
+            'facets': self.facets(facet_rows, goals),
+        })
+
+    def page(self):
+        # Keyset pagination instead of OFFSET so deep pages stay as cheap as the first one.
+        # The goal is joined in the same query
+        return keyset_page(
+            self.filtered.select_related('saving_goal'),
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+            per_page=self.paginate_by,
+        )
+
+    def query_with(self, **params):
+        # The current filters as a query string (without the page cursor), with params changed
+        query = self.request.GET.copy()
+        for key in ('after', 'before', *params):
+            query.pop(key, None)
+        for key, value in params.items():
+            if value is not None:
+                query[key] = value
+        return query.urlencode()
+
+    def cached_facet_rows(self):
+        # The counts only change with the transactions, so every page of the same filters shares them
+        return caching.cached_list(
+            caching.TRANSACTIONS, self.request.user.id, f'facets:{self.filter_form.cache_key()}',
+            lambda: facet_rows(self.filtered),
+        )
+
+    def facets(self, rows, goals):
+        counts = facet_counts(rows)
+        goal_names = {goal.id: goal.name for goal in goals}
+        selected = self.request.GET
+        months = []
+        for month, count in sorted(counts['months'].items(), reverse=True):
+            month_end = (month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            months.append({
+                'label': month.strftime('%b %Y'), 'count': count,
+                'query': self.query_with(date_from=month.isoformat(), date_to=month_end.isoformat()),
+                'active': selected.get('date_from') == month.isoformat() and selected.get('date_to') == month_end.isoformat(),
+            })
+        return {
+            'types': [
+                {'label': label, 'count': counts['types'][value], 'query': self.query_with(transaction_type=value),
+                 'active': selected.get('transaction_type') == value}
+                for value, label in Transaction.TRANSACTION_TYPE_CHOICES if counts['types'][value]
+            ],
+            'goals': [
+                {'label': goal_names.get(goal_id, 'No goal'), 'count': count,
+                 'query': self.query_with(saving_goal=str(goal_id) if goal_id else NO_GOAL),
+                 'active': selected.get('saving_goal') == (str(goal_id) if goal_id else NO_GOAL)}
+                for goal_id, count in counts['goals'].most_common()
+            ],
+            'months': months,
+        }
+
+class TransactionDetail(AsyncDetailView):
     model = Transaction
     template_name = 'main_app/transaction_detail.html'
     context_object_name = 'transaction'
     
-class TransactionUpdate(UpdateView):
+class TransactionUpdate(LoginRequiredMixin, UserGoalsMixin, UpdateView):
     model = Transaction
     fields = ['name','transaction_type','description','saving_goal',
               'amount','saving_amount','checking_amount','transaction_date']
     success_url = '/transactions/'
 
+    def get_queryset(self):
+        # form_valid() makes the transaction the user's, so only their own can be edited
+        return Transaction.objects.filter(user=self.request.user)
+
 
     def form_valid(self, form):
         form.instance.user = self.request.user
@@ -201,33 +350,216 @@ class TransactionUpdate(UpdateView):
             return self.form_invalid(form)
         
 
-class TransactionDelete(DeleteView):
+class TransactionImportForm(forms.Form):
+    FORMAT_CHOICES = [
+        ('', 'Detect from file name'),
+        ('csv', 'CSV'),
+        ('ofx', 'OFX / QFX'),
+    ]
+
+    file = forms.FileField()
+    file_format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+
+
+class TransactionImport(LoginRequiredMixin, FormView):
+    form_class = TransactionImportForm
+    template_name = 'main_app/transaction_import.html'
+    BACKGROUND_SIZE = 1024 * 1024  # Bytes
+    RECENT_IMPORTS = 5
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['csv_columns'] = CSV_COLUMNS
+        # The user's latest background imports, with what they created and skipped once done
+        recent = (
+            Job.objects.filter(task='import_transactions', payload__user_id=self.request.user.id)
+            .order_by('-created_at', '-id')[:self.RECENT_IMPORTS]
+        )
+        context['background_imports'] = [
+            {'name': os.path.basename(job.payload['path']), 'job': job, 'result': job.result} for job in recent
+        ]
+        return context
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        file_format = form.cleaned_data['file_format'] or detect_format(upload.name)
+
+        # Big files are imported by the background worker so the request returns right away
+        if upload.size > self.BACKGROUND_SIZE:
+            path = upload_storage.save(f'{self.request.user.id}/{upload.name}', upload)
+            # No retries: batches that were already committed would be imported twice
+            jobs.enqueue('import_transactions', max_attempts=1, path=path, user_id=self.request.user.id, file_format=file_format)
+            return self.render_to_response(self.get_context_data(form=form, queued=True))
+
+        # The file is parsed and inserted in batches, never loaded whole into memory
+        result = import_transactions(read_upload(upload, file_format), self.request.user)
+        return self.render_to_response(self.get_context_data(form=form, result=result))
+
+
+class TransactionExport(LoginRequiredMixin, View):
+    # /transactions/export/?format=csv|ndjson&start=YYYY-MM-DD&end=YYYY-MM-DD&goal=<id>
+    CONTENT_TYPES = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    def get(self, request):
+        file_format = request.GET.get('format', 'csv')
+        if file_format not in self.CONTENT_TYPES:
+            return HttpResponseBadRequest("format must be csv or ndjson")
+
+        transactions = Transaction.objects.filter(user=request.user).order_by('transaction_date', 'id')
+        try:
+            if request.GET.get('start'):
+                transactions = transactions.filter(transaction_date__gte=date.fromisoformat(request.GET['start']))
+            if request.GET.get('end'):
+                transactions = transactions.filter(transaction_date__lte=date.fromisoformat(request.GET['end']))
+            if request.GET.get('goal'):
+                transactions = transactions.filter(saving_goal_id=int(request.GET['goal']))
+        except ValueError:
+            return HttpResponseBadRequest("start/end must be YYYY-MM-DD dates and goal a goal id")
+
+        # Compress on the fly when the client can take it (GZipMiddleware is not enabled)
+        compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+        response = StreamingHttpResponse(
+            export_chunks(transactions, file_format, compress=compress),
+            content_type=self.CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="transactions.{file_format}"'
+        response['Vary'] = 'Accept-Encoding'
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        return response
+
+
+class TransactionBulkForm(forms.Form):
+    ACTION_CHOICES = [
+        ('delete', 'Delete'),
+        (Transaction.INCOME, 'Mark as income'),
+        (Transaction.EXPENDITURE, 'Mark as expenditure'),
+        ('set_goal', 'Link to goal'),
+    ]
+
+    action = forms.ChoiceField(choices=ACTION_CHOICES)
+    ids = forms.Field(required=False, widget=forms.MultipleHiddenInput)
+    saving_goal = forms.ModelChoiceField(queryset=Goal.objects.none(), required=False)
+
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only the user's own goals are valid choices
+        self.fields['saving_goal'].queryset = Goal.objects.filter(user=user).only('id')
+
+    def clean_ids(self):
+        # Each id goes through an IntegerField (str.isdigit() also passes '²')
+        id_field = forms.IntegerField(min_value=1)
+        return [id_field.clean(pk) for pk in self.cleaned_data['ids'] or []]
+
+
+class TransactionBulk(LoginRequiredMixin, View):
+    # Delete or re-categorize the transactions ticked on the list in one go
+    def post(self, request):
+        form = TransactionBulkForm(request.user, request.POST)
+        if not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_text())
+        transactions = Transaction.objects.filter(user=request.user, pk__in=form.cleaned_data['ids'])
+        action = form.cleaned_data['action']
+        if action == 'delete':
+            delete_transactions(transactions)
+        elif action == 'set_goal':
+            goal = form.cleaned_data['saving_goal']
+            update_transactions(transactions, saving_goal_id=goal.pk if goal else None)
+        else:
+            update_transactions(transactions, transaction_type=action)
+        next_url = request.POST.get('next')
+        if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+            next_url = 'transaction-index'
+        return redirect(next_url)
+
+
+class TransactionDelete(LoginRequiredMixin, DeleteView):
     model = Transaction
     success_url = '/transactions/'  # Redirect to the transaction list after successful deletion
 
-    def delete(self, request, *args, **kwargs):
-        # Fetch the transaction to be deleted
-        transaction = self.get_object()
+    def get_queryset(self):
+        return Transaction.objects.filter(user=self.request.user)
+
+    # Balances are reversed in Transaction.delete(), which DeleteView calls for
+    # both POST and DELETE requests, so there is nothing else to do here
+
+
+@login_required
+def search(request):
+    # Full-text search over the user's goals and transactions (see search.py)
+    query = request.GET.get('q', '').strip()
+    return render(request, 'main_app/search.html', {
+        'query': query,
+        'goals': search_goals(request.user, query) if query else [],
+        'transactions': search_transactions(request.user, query) if query else [],
+    })
+
+
+# Recurring transactions
+
+UPCOMING_DAYS = 60  # How far ahead the recurring page looks
+
+
+class RecurringList(LoginRequiredMixin, ListView):
+    template_name = 'main_app/recurring_list.html'
+    context_object_name = 'rules'
+
+    def get_queryset(self):
+        return Recurring_Transaction.objects.filter(user=self.request.user).select_related('saving_goal').order_by('next_date', 'pk')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Upcoming occurrences are computed from the rules, there are no rows for them yet
+        until = date.today() + timedelta(days=UPCOMING_DAYS)
+        context['upcoming'] = upcoming(context['rules'], until, limit=50)
+        context['upcoming_days'] = UPCOMING_DAYS
+        return context
+
+
+class RecurringFormMixin(LoginRequiredMixin):
+    model = Recurring_Transaction
+    fields = ['name', 'transaction_type', 'description', 'saving_goal', 'amount', 'saving_amount',
+              'checking_amount', 'interval', 'start_date', 'end_date']
+    template_name = 'main_app/recurring_form.html'
+    success_url = '/recurring/'
+
+    def get_queryset(self):
+        return Recurring_Transaction.objects.filter(user=self.request.user)
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        form.fields['saving_goal'].queryset = Goal.objects.filter(user=self.request.user)
+        return form
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        try:
+            return super().form_valid(form)
+        except ValueError as e:
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
+
+
+class RecurringCreate(RecurringFormMixin, CreateView):
+    pass
+
+
+class RecurringUpdate(RecurringFormMixin, UpdateView):
+    pass
+
+
+class RecurringDelete(LoginRequiredMixin, DeleteView):
+    # Only the rule goes, the transactions it already booked stay
+    model = Recurring_Transaction
+    success_url = '/recurring/'
+
+    def get_queryset(self):
+        return Recurring_Transaction.objects.filter(user=self.request.user)
+
 
-        if transaction.saving_goal:
-            # Subtract the saving_amount from the goal's amount_saved
-            transaction.saving_goal.amount_saved -= transaction.saving_amount
-            transaction.saving_goal.save()  
-        else:
-            # If no goal is linked, we should update the Saving_Account balance
-            saving_account = Saving_Account.objects.first()  
-            if saving_account:
-                saving_account.balance -= transaction.saving_amount
-                saving_account.save()  # Save the updated Saving_Account balance
-            else:
-                print("No Saving Account found. Skipping balance update.")
-
-        # Now delete the transaction, regardless of Saving_Account existence
-        response = super().delete(request, *args, **kwargs)
-
-        # Return the response after the transaction deletion to ensure proper redirection
-        return response
-    
 def signup(request):
     error_message = ''
     if request.method == 'POST':
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main_app.middleware.ServerTimingMiddleware',  # First, so it sees every query (only active with SERVER_TIMING)
+    'main_app.middleware.ReplicaRoutingMiddleware',  # Only active with a replica in DATABASES
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,19 +53,34 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request SQL/template/view timings in a Server-Timing header, and a warning on the
+# 'main_app.performance' logger (with the slowest SQL) for requests over SLOW_REQUEST_MS.
+# Off by default: set SAVE_WISE_SERVER_TIMING=1 to turn it on
+SERVER_TIMING = os.environ.get('SAVE_WISE_SERVER_TIMING') == '1'
+SLOW_REQUEST_MS = int(os.environ.get('SAVE_WISE_SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_TOP_QUERIES = 5
+
 ROOT_URLCONF = 'save_wise.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, with renders timed for Server-Timing (see main_app/templating.py)
+        'BACKEND': 'main_app.templating.TimedDjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates are compiled once per process and reused for every render
+            # (runserver's autoreloader clears this cache when a template file changes)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -73,13 +91,88 @@ WSGI_APPLICATION = 'save_wise.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# Connections are kept open between requests (SAVE_WISE_DB_CONN_MAX_AGE seconds) and checked
+# before reuse, so a request no longer pays for a new connection. With SAVE_WISE_DB_POOL_SIZE
+# set they come from a psycopg 3 pool instead (needs `psycopg[pool]` rather than psycopg2).
+DB_CONN_MAX_AGE = int(os.environ.get('SAVE_WISE_DB_CONN_MAX_AGE', 60))
+DB_POOL_SIZE = int(os.environ.get('SAVE_WISE_DB_POOL_SIZE', 0))
+
+
+def database(prefix, name):
+    # SAVE_WISE_<prefix>_NAME/HOST/PORT/USER/PASSWORD override the defaults
+    config = {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'save_wise',
+        'NAME': os.environ.get(f'SAVE_WISE_{prefix}_NAME', name),
     }
+    for key in ('HOST', 'PORT', 'USER', 'PASSWORD'):
+        if os.environ.get(f'SAVE_WISE_{prefix}_{key}'):
+            config[key] = os.environ[f'SAVE_WISE_{prefix}_{key}']
+    if DB_POOL_SIZE:
+        config['OPTIONS'] = {'pool': {'min_size': 1, 'max_size': DB_POOL_SIZE}}
+    else:
+        config['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+        config['CONN_HEALTH_CHECKS'] = True
+    return config
+
+
+DATABASES = {
+    'default': database('DB', 'save_wise'),
 }
 
+# A read replica (SAVE_WISE_REPLICA_NAME or _HOST set) serves the reads of GET requests, see
+# main_app/routers.py. Locally, a second database can stand in for it. Tests use the primary.
+if os.environ.get('SAVE_WISE_REPLICA_NAME') or os.environ.get('SAVE_WISE_REPLICA_HOST'):
+    DATABASES['replica'] = {**database('REPLICA', DATABASES['default']['NAME']), 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['main_app.routers.PrimaryReplicaRouter']
+
+# After a write, the user's reads stay on the primary this long (keep it above the replica lag)
+REPLICA_PIN_SECONDS = int(os.environ.get('SAVE_WISE_REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# In-process memory by default; set SAVE_WISE_CACHE_DIR to share a file-based cache between workers
+
+if os.environ.get('SAVE_WISE_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['SAVE_WISE_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'save-wise',
+        }
+    }
+
+# Async views run their independent queries at the same time, each on its own connection
+# (see main_app/aio.py). Off: one after the other on the request's connection.
+CONCURRENT_QUERIES = True
+
+# How long cached goal/account lists are kept (they are invalidated on every change anyway)
+MAIN_APP_CACHE_TIMEOUT = 60 * 60
+
+# The logged-in user comes from the cache (main_app/auth.py), and with the shared cache the
+# session does too (main_app/sessions.py), so an authenticated request doesn't query the
+# database for either. Sessions stay in the database with the per-process cache: a logout in
+# one worker would leave the session in the other workers' caches
+if os.environ.get('SAVE_WISE_CACHE_DIR'):
+    SESSION_ENGINE = 'main_app.sessions'
+# Session changes are written to the database at most this often (seconds)
+MAIN_APP_SESSION_DB_WRITE_INTERVAL = 300
+MAIN_APP_USER_CACHE_TIMEOUT = 60
+
+AUTHENTICATION_BACKENDS = [
+    'main_app.auth.CachedModelBackend',
+    # Only finds the user of sessions logged in before the cached backend existed
+    # (CachedModelBackend ends a failed login, so passwords are not checked twice)
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -120,6 +213,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# `manage.py collectstatic` builds this directory: content-hashed files, a staticfiles.json
+# manifest and pre-compressed .gz/.br copies (see main_app/storage.py). Serve it with a
+# far-future Cache-Control ("public, max-age=31536000, immutable") and the web server's
+# gzip_static/brotli_static, so nothing is compressed per request.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Development serves the files from the apps as they are, no collectstatic needed
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'main_app.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 LOGIN_REDIRECT_URL = 'home'
 
 # Add this variable to specify where logging out redirects to